@@ -0,0 +1,110 @@
+"""Per-render cost of PromptManager templates.
+
+"before" re-parses the template and renders it through PromptTemplate.invoke
+on every call (the previous behaviour), "after" is the current PromptManager.
+"lesson_output" times the prompts of a whole lesson fan-out the way the graph
+builds them: lesson_author renders the syllabus once and every lesson_writer
+task formats its prompt from the rendered text in its Send payload.
+
+Run from apps/api: python -m benchmarks.prompt_manager_benchmark
+"""
+
+import timeit
+
+from langchain_core.prompts import PromptTemplate
+
+from src.app.core.ai import prompt_manager as pm
+from src.app.core.ai.prompt_manager import PromptManager
+
+NUMBER = 200
+
+SYLLABUS = {
+    "reason": "Balanced progression from fundamentals to application.",
+    "feedback": "Four chapters with increasing Bloom levels.",
+    "chapters": [
+        {
+            "overview": f"Chapter {c} overview",
+            "bloom": c,
+            "difficulty": "medium",
+            "lessons": [
+                {"type": "text", "bloom": c, "overview": f"Lesson {c}.{l}"}
+                for l in range(1, 6)
+            ],
+        }
+        for c in range(1, 5)
+    ],
+}
+CHAPTERS = [
+    {"title": f"Chapter {c}", "overview": f"Chapter {c} overview", "lesson_count": 5}
+    for c in range(1, 5)
+]
+
+
+def _before_lesson_prompt(chapter: dict):
+    return (
+        PromptTemplate.from_template(pm._LESSON_OUTPUT_TEMPLATE.template)
+        .invoke(
+            {
+                "syllabus": PromptManager._format_syllabus(SYLLABUS),
+                "chapter_title": chapter.get("title", ""),
+                "chapter_overview": chapter.get("overview", ""),
+                "lesson_count": chapter.get("lesson_count", 0),
+                "previous_lessons": " None yet",
+            }
+        )
+        .to_string()
+    )
+
+
+def _before_lesson_fan_out():
+    return [
+        _before_lesson_prompt(chapter)
+        for chapter in CHAPTERS
+        for _ in range(chapter["lesson_count"])
+    ]
+
+
+def _after_lesson_fan_out():
+    payload = {"syllabus_text": PromptManager.render_syllabus(SYLLABUS).text}
+
+    return [
+        PromptManager.get_lesson_output_prompt(payload["syllabus_text"], chapter)
+        for chapter in CHAPTERS
+        for _ in range(chapter["lesson_count"])
+    ]
+
+
+def _before_objective_architect_prompt():
+    return (
+        PromptTemplate.from_template(pm._OBJECTIVE_ARCHITECT_TEMPLATE.template)
+        .invoke({"information_list": "I want a Python course", "feedback": ""})
+        .to_string()
+    )
+
+
+CASES = {
+    "lesson_output": (_before_lesson_fan_out, _after_lesson_fan_out),
+    "objective_architect": (
+        _before_objective_architect_prompt,
+        lambda: PromptManager.get_objective_architect_prompt(
+            "I want a Python course", ""
+        ),
+    ),
+}
+
+
+def main():
+    for name, (before, after) in CASES.items():
+        assert before() == after()
+
+        before_us = timeit.timeit(before, number=NUMBER) / NUMBER * 1e6
+        after_us = timeit.timeit(after, number=NUMBER) / NUMBER * 1e6
+
+        print(
+            f"{name:<22} before {before_us:8.1f} us/call   "
+            f"after {after_us:8.1f} us/call   x{before_us / after_us:.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
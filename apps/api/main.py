@@ -3,11 +3,13 @@ from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from prometheus_client import make_asgi_app
 
 from src.app.controllers.ai.ai_controller import ai_router
 from src.app.controllers.auth.auth_controller import auth_router
 from src.app.controllers.draft.draft_controller import draft_router
 from src.app.core.container import Container
+from src.app.core.telemetry import setup_telemetry, shutdown_telemetry
 
 
 @asynccontextmanager
@@ -15,9 +17,15 @@ async def lifespan(app: FastAPI):
     with open("api-schema.json", "w") as f:
         json.dump(app.openapi(), f, indent=2)
     yield
+    ai_service = await container.ai_service()
+    await ai_service.close()
+    await container.shutdown_resources()
+    shutdown_telemetry()
 
 
 app = FastAPI(lifespan=lifespan)
+app.mount("/metrics", make_asgi_app())
+setup_telemetry(app)
 
 container = Container()
 container.wire(
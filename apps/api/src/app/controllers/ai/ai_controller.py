@@ -9,11 +9,23 @@ from src.app.core.ai.ai_schema import Message, AuthData
 from src.app.core.container import Container
 from src.app.jwt.jwt_strategy import get_current_user
 from src.app.schemas.auth_schemas import UserResponse
+from src.app.schemas.lms_schemas import ExportJob
+from src.app.schemas.usage_schemas import DraftUsage
 from src.app.services.ai.ai_service import AiService
 
 ai_router = APIRouter(prefix="/api/v1/ai")
 
 
+@ai_router.get("/usage/{draft_id}", response_model=DraftUsage)
+@inject
+async def get_draft_usage(
+    current_user: Annotated[UserResponse, Depends(get_current_user)],
+    draft_id: UUID,
+    ai_service: Annotated[AiService, Depends(Provide(Container.ai_service))],
+):
+    return await ai_service.get_draft_usage(current_user, draft_id)
+
+
 @ai_router.get("/course-schema/{draft_id}")
 @inject
 async def get_course_schema(
@@ -24,7 +36,17 @@ async def get_course_schema(
     return await ai_service.get_course_schema(current_user, draft_id)
 
 
-@ai_router.post("/export/{draft_id}")
+@ai_router.get("/export/jobs/{job_id}", response_model=ExportJob)
+@inject
+async def get_export_job(
+    current_user: Annotated[UserResponse, Depends(get_current_user)],
+    job_id: str,
+    ai_service: Annotated[AiService, Depends(Provide(Container.ai_service))],
+):
+    return await ai_service.get_export_job(current_user, job_id)
+
+
+@ai_router.post("/export/{draft_id}", status_code=202, response_model=ExportJob)
 @inject
 async def export_to_lms(
     current_user: Annotated[UserResponse, Depends(get_current_user)],
@@ -44,7 +66,7 @@ async def chat(
     ai_service: Annotated[AiService, Depends(Provide(Container.ai_service))],
 ):
     return StreamingResponse(
-        ai_service.chat(current_user, message.message, draft_id),
+        await ai_service.chat(current_user, message.message, draft_id),
         media_type="text/plain; charset=utf-8",
         headers={
             "X-Vercel-AI-Data-Stream": "v1",
@@ -47,6 +47,17 @@ async def logout(
     return {"message": "Successfully logged out"}
 
 
+@auth_router.post("/logout/all")
+@inject
+async def logout_all(
+    response: Response,
+    current_user: Annotated[UserResponse, Depends(get_current_user)],
+    auth_service: AuthService = Depends(Provide[Container.auth_service]),
+):
+    await auth_service.logout_everywhere(response, current_user.id)
+    return {"message": "Successfully logged out of all sessions"}
+
+
 @auth_router.get("/me", response_model=UserResponse)
 async def get_user_me(current_user: Annotated[User, Depends(get_current_user)]):
     return current_user
@@ -1,15 +1,18 @@
 import json
 import os
+import time
 from typing import Literal
 
 from dotenv import load_dotenv
-from langchain.chat_models import init_chat_model
 from langchain_core.messages import SystemMessage, HumanMessage, AIMessage
+from langchain_core.messages.utils import count_tokens_approximately, trim_messages
 
 from langgraph.checkpoint.postgres import PostgresSaver
-from langgraph.constants import START, END
+from langgraph.config import get_stream_writer
+from langgraph.constants import START, END, TAG_NOSTREAM
 from langgraph.graph import StateGraph
-from langgraph.types import Command, interrupt
+from langgraph.types import Command, Send, interrupt
+from pydantic import BaseModel
 
 from src.app.core.ai.ai_schema import (
     DataCuratorOutput,
@@ -19,27 +22,305 @@ from src.app.core.ai.ai_schema import (
     Syllabus,
     Course,
     Chapter,
+    ChapterOutput,
     CourseOutput,
     Lesson,
 )
+from src.app.core.ai.models import (
+    OFFLINE_ACTIVE,
+    current_model,
+    get_model,
+    model_name_for,
+)
 from src.app.core.ai.prompt_manager import PromptManager
+from src.app.core.ai.response_cache import ResponseCache
+from src.app.core.ai.semantic_cache import SEMANTIC_CACHE_ENABLED, SemanticCache
+from src.app.core.ai.usage import UsageRecorder
+from src.app.core.telemetry import tracer
 
 load_dotenv()
 
-model = init_chat_model("openai:gpt-4.1-mini")
 prompt_manager = PromptManager()
+# The container binds these to its Redis client (see init_response_cache and
+# init_usage_recorder), until then they are in-process only.
+response_cache = ResponseCache()
+usage = UsageRecorder()
+# Stand-in answers must not be served to real runs through the shared cache.
+semantic_cache = SemanticCache(enabled=SEMANTIC_CACHE_ENABLED and not OFFLINE_ACTIVE)
+
+# "concurrent" fans chapters and lessons out as parallel graph tasks,
+# "sequential" generates them one by one with the previously generated items
+# as context. The concurrency caps the graph tasks run at once.
+LESSON_AUTHOR_MODE = os.getenv("LESSON_AUTHOR_MODE", "concurrent")
+LESSON_AUTHOR_CONCURRENCY = int(os.getenv("LESSON_AUTHOR_CONCURRENCY", "8"))
+
+# Once the messages that are not summarized yet exceed the trigger, all but
+# the most recent ones are folded into the rolling history summary. Nodes
+# then see the summary plus as many recent messages as their budget allows.
+HISTORY_COMPACTION_TRIGGER_TOKENS = int(
+    os.getenv("HISTORY_COMPACTION_TRIGGER_TOKENS", "6000")
+)
+HISTORY_KEEP_RECENT_MESSAGES = int(os.getenv("HISTORY_KEEP_RECENT_MESSAGES", "8"))
+HISTORY_TOKEN_BUDGETS = {
+    "data_curator": 6000,
+    "objective_architect": 4000,
+    "evaluator_oa": 3000,
+    "evaluator_cd": 3000,
+}
+
+# Default retry budget of the generator/evaluator stages, a draft can override
+# it through ``retry_budget`` in its state. When an evaluator still asks for a
+# retry after the budget is spent, the best scored attempt is accepted.
+STAGE_MAX_ITERATIONS = int(os.getenv("STAGE_MAX_ITERATIONS", "3"))
+STAGE_MAX_TOKENS = int(os.getenv("STAGE_MAX_TOKENS", "60000"))
+STAGE_MAX_SECONDS = float(os.getenv("STAGE_MAX_SECONDS", "180"))
+
+
+def _progress(event: str, **data):
+    """Publish a progress event on the graph's custom stream."""
+    get_stream_writer()({"event": event, **data})
+
+
+def _render_prompt(prompt) -> str:
+    if isinstance(prompt, str):
+        return prompt
+
+    return "\n\n".join(message.content for message in prompt)
+
+
+async def _invoke_structured(
+    schema, prompt, cache_scope: str | None = None, use_cache: bool = True
+):
+    """Structured LLM call, answered from the caches when possible.
+
+    Identical requests are served by the exact-match response cache. Calls
+    with a ``cache_scope`` additionally use the semantic cache; the scope is
+    part of its namespace, so a prompt can only match prompts that generate
+    the same kind of item (e.g. lesson 2 of chapter 3) and never a sibling
+    with a similar prompt. The namespace is shared by all users, so only
+    prompts built from generated course material may pass a scope, never
+    prompts containing the conversation. Cached results are returned as
+    dicts.
+
+    Generator retries pass ``use_cache=False``: answering them from a cache
+    would hand the rejected result back to the evaluator forever.
+    """
+    if not use_cache:
+        return await _call_model(schema, prompt)
+
+    model_name, _ = current_model()
+    key = response_cache.key(model_name, schema, prompt)
+    cached = await response_cache.get(key)
+    if cached is not None:
+        await usage.cache_hit("exact")
+        return cached
+
+    namespace = f"{schema.__name__}:{cache_scope}"
+    rendered = _render_prompt(prompt)
+    embedding = None
+
+    if cache_scope is not None:
+        cached, embedding = await semantic_cache.lookup(namespace, rendered)
+        if cached is not None:
+            await usage.cache_hit("semantic")
+            await response_cache.set(key, cached)
+            return cached
+
+    result = await _call_model(schema, prompt)
+    result_data = (
+        result.model_dump(mode="json") if isinstance(result, BaseModel) else result
+    )
+
+    await response_cache.set(key, result_data)
+
+    if cache_scope is not None:
+        await semantic_cache.store(namespace, rendered, embedding, result_data)
 
+    return result
+
+
+async def _call_model(schema, prompt):
+    """Structured call to the running node's model, recording its latency and
+    token usage."""
+    model_name, model = current_model()
+
+    with tracer.start_as_current_span(
+        f"llm {schema.__name__}", attributes={"llm.model": model_name}
+    ):
+        start = time.perf_counter()
+        result = await model.with_structured_output(schema, include_raw=True).ainvoke(
+            prompt
+        )
+        await usage.llm_call(
+            model_name, result["raw"].usage_metadata, time.perf_counter() - start
+        )
 
-def data_curator(
+    if result["parsing_error"] is not None:
+        raise result["parsing_error"]
+
+    return result["parsed"]
+
+
+async def _compact_history(state: MessagesState) -> dict:
+    """Fold older messages into the rolling summary once they exceed the trigger.
+
+    Messages stay in state (the draft history is shown to the user), only the
+    ``summarized_messages`` cursor moves forward.
+    """
+    messages = state.get("messages", [])
+    start = state.get("summarized_messages") or 0
+
+    if (
+        count_tokens_approximately(messages[start:])
+        <= HISTORY_COMPACTION_TRIGGER_TOKENS
+    ):
+        return {}
+
+    cutoff = len(messages) - HISTORY_KEEP_RECENT_MESSAGES
+    if cutoff <= start:
+        return {}
+
+    prompt = prompt_manager.get_history_summary_prompt(
+        state.get("history_summary"),
+        "\n".join(f"{msg.type}: {msg.content}" for msg in messages[start:cutoff]),
+    )
+    model_name = model_name_for("history_summary")
+    started = time.perf_counter()
+    summary = (
+        await get_model(model_name)
+        .with_config(tags=[TAG_NOSTREAM])
+        .ainvoke([SystemMessage(content=prompt)])
+    )
+    await usage.llm_call(
+        model_name, summary.usage_metadata, time.perf_counter() - started
+    )
+
+    return {"history_summary": summary.content, "summarized_messages": cutoff}
+
+
+def _start_stage(state: MessagesState, stage: str) -> dict:
+    """State update opening a fresh attempt record for a generator stage."""
+    return {
+        "stage_attempts": {
+            **(state.get("stage_attempts") or {}),
+            stage: {
+                "iterations": 0,
+                "tokens_at_start": state.get("llm_tokens") or 0,
+                "started_at": time.time(),
+                "best": None,
+                "best_score": None,
+            },
+        }
+    }
+
+
+def _review_stage(
+    state: MessagesState, stage: str, field: str, response: dict
+) -> tuple[bool, dict]:
+    """Record an evaluation of ``state[field]`` and decide whether to retry.
+
+    Returns the retry decision and the state update. Once the stage used up
+    its iterations, tokens or time, the best scored attempt so far is written
+    back to ``field`` instead of retrying.
+    """
+    attempts = dict(state.get("stage_attempts") or {})
+    record = dict(
+        attempts.get(stage) or _start_stage(state, stage)["stage_attempts"][stage]
+    )
+    score = response.get("score") or 0
+
+    record["iterations"] += 1
+    if record["best"] is None or score >= (record["best_score"] or 0):
+        record["best"] = state.get(field)
+        record["best_score"] = score
+
+    attempts[stage] = record
+    update = {"stage_attempts": attempts}
+
+    if not response.get("retry"):
+        usage.stage_finished(stage, record["iterations"], "accepted")
+        return False, update
+
+    budget = {
+        "max_iterations": STAGE_MAX_ITERATIONS,
+        "max_tokens": STAGE_MAX_TOKENS,
+        "max_seconds": STAGE_MAX_SECONDS,
+        **(state.get("retry_budget") or {}),
+    }
+    tokens = (
+        (state.get("llm_tokens") or 0) + usage.node_tokens() - record["tokens_at_start"]
+    )
+    exhausted = [
+        limit
+        for limit, spent in (
+            ("max_iterations", record["iterations"]),
+            ("max_tokens", tokens),
+            ("max_seconds", time.time() - record["started_at"]),
+        )
+        if spent >= budget[limit]
+    ]
+
+    if not exhausted:
+        return True, update
+
+    usage.stage_finished(stage, record["iterations"], "budget_exhausted")
+    _progress(
+        "stage_budget_exhausted",
+        stage=stage,
+        limits=exhausted,
+        iterations=record["iterations"],
+        best_score=record["best_score"],
+    )
+
+    return False, {**update, field: record["best"]}
+
+
+def _recent_messages(state: MessagesState, node: str) -> list:
+    messages = state.get("messages", [])[state.get("summarized_messages") or 0 :]
+
+    recent = trim_messages(
+        messages,
+        max_tokens=HISTORY_TOKEN_BUDGETS[node],
+        token_counter=count_tokens_approximately,
+        strategy="last",
+        start_on="human",
+    )
+
+    return recent or messages[-1:]
+
+
+def _history_text(state: MessagesState, node: str) -> str:
+    """Conversation for prompts that embed it as text, bounded by the node budget."""
+    lines = []
+
+    if state.get("history_summary"):
+        lines.append(f"Summary of earlier conversation: {state.get('history_summary')}")
+
+    lines.extend(
+        msg.content for msg in _recent_messages(state, node) if hasattr(msg, "content")
+    )
+
+    return "\n".join(lines)
+
+
+@usage.node
+async def data_curator(
     state: MessagesState,
 ) -> Command[Literal["repeat_curator", "objective_architect", END]]:
-    print("data_curator")
-    dc_model = model.with_structured_output(DataCuratorOutput)
-    prompt_messages = [
-        SystemMessage(content=prompt_manager.get_curator_prompt())
-    ] + state.get("messages")
+    _progress("node_started", node="data_curator")
+    compaction = await _compact_history(state)
+    state = {**state, **compaction}
 
-    result = dc_model.invoke(prompt_messages)
+    prompt_messages = [SystemMessage(content=prompt_manager.get_curator_prompt())]
+    if state.get("history_summary"):
+        prompt_messages.append(
+            SystemMessage(
+                content=f"Summary of earlier conversation: {state.get('history_summary')}"
+            )
+        )
+    prompt_messages += _recent_messages(state, "data_curator")
+
+    result = await _invoke_structured(DataCuratorOutput, prompt_messages)
     goto = "repeat_curator" if result.get("gather_more_info") else "objective_architect"
 
     goto = goto if result.get("create_course") else END
@@ -48,31 +329,29 @@ def data_curator(
         goto=goto,
         update={
             "messages": [AIMessage(content=result.get("message"))],
-            "llm_calls": state.get("llm_calls", 0) + 1,
+            **compaction,
         },
     )
 
 
-def repeat_curator(state: MessagesState) -> Command[Literal["data_curator"]]:
+@usage.node
+async def repeat_curator(state: MessagesState) -> Command[Literal["data_curator"]]:
     resumed = interrupt("PROVIDE_MORE_INFORMATION")
-    print("repeat_curator")
+    _progress("node_started", node="repeat_curator")
 
     return Command(
         goto="data_curator",
         update={
             "messages": [HumanMessage(content=resumed)],
-            "llm_calls": state.get("llm_calls", 0) + 1,
         },
     )
 
 
-def objective_architect(state: MessagesState) -> Command[Literal["evaluator_oa"]]:
-    oa_model = model.with_structured_output(AnalyzedData)
-    print("objective_architect")
+@usage.node
+async def objective_architect(state: MessagesState) -> Command[Literal["evaluator_oa"]]:
+    _progress("node_started", node="objective_architect")
 
-    messages_text = "\n".join(
-        [msg.content for msg in state.get("messages", []) if hasattr(msg, "content")]
-    )
+    messages_text = _history_text(state, "objective_architect")
 
     feedback = (
         state.get("evaluator").get("feedback")
@@ -81,6 +360,12 @@ def objective_architect(state: MessagesState) -> Command[Literal["evaluator_oa"]
         else None
     )
 
+    if feedback:
+        await usage.retry()
+        stage = {}
+    else:
+        stage = _start_stage(state, "objective_architect")
+
     prompt = [
         SystemMessage(
             content=prompt_manager.get_objective_architect_prompt(
@@ -89,21 +374,24 @@ def objective_architect(state: MessagesState) -> Command[Literal["evaluator_oa"]
         )
     ]
 
-    response = oa_model.invoke(prompt)
+    # The prompt holds the user's own conversation, so it only gets the
+    # exact-match cache: a semantic match could hand another user's analysis
+    # back.
+    response = await _invoke_structured(AnalyzedData, prompt, use_cache=not feedback)
 
     return Command(
         goto="evaluator_oa",
         update={
             "analyzed_data": response,
-            "llm_calls": state.get("llm_calls", 0) + 1,
             "evaluator": None,
+            **stage,
         },
     )
 
 
-def evaluator_oa(state: MessagesState):
-    print("evaluator_oa")
-    model_eval = model.with_structured_output(EvaluatorOutput)
+@usage.node
+async def evaluator_oa(state: MessagesState):
+    _progress("node_started", node="evaluator_oa")
     analyzed_data = state.get("analyzed_data")
     if not analyzed_data:
         return Command(
@@ -115,18 +403,15 @@ def evaluator_oa(state: MessagesState):
         SystemMessage(
             content=prompt_manager.get_evaluator_oa_prompt(
                 analyzed_data,
-                "\n".join(
-                    [
-                        msg.content
-                        for msg in state.get("messages")
-                        if hasattr(msg, "content")
-                    ]
-                ),
+                _history_text(state, "evaluator_oa"),
             )
         )
     ]
 
-    response = model_eval.invoke(prompt)
+    response = await _invoke_structured(EvaluatorOutput, prompt)
+    retry, stage = _review_stage(
+        state, "objective_architect", "analyzed_data", response
+    )
 
     feedback_state = (
         {
@@ -134,38 +419,50 @@ def evaluator_oa(state: MessagesState):
             "feedback": response.get("feedback"),
             "agent": "objective_architect",
         }
-        if response.get("retry")
+        if retry
         else None
     )
 
     return Command(
         goto="objective_architect" if feedback_state else "curriculum_designer",
-        update={"evaluator": feedback_state},
+        update={"evaluator": feedback_state, **stage},
     )
 
 
-def curriculum_designer(state: MessagesState):
-    print("cd")
-    cd_model = model.with_structured_output(Syllabus)
+@usage.node
+async def curriculum_designer(state: MessagesState):
+    _progress("node_started", node="curriculum_designer")
 
     prompt = prompt_manager.get_curriculum_designer_prompt(state.get("analyzed_data"))
 
-    response = cd_model.invoke(prompt)
+    is_retry = (
+        state.get("evaluator")
+        and state.get("evaluator").get("agent") == "curriculum_designer"
+    )
+    if is_retry:
+        await usage.retry()
+        stage = {}
+    else:
+        stage = _start_stage(state, "curriculum_designer")
+
+    response = await _invoke_structured(
+        Syllabus, prompt, cache_scope="syllabus", use_cache=not is_retry
+    )
 
     return Command(
         goto="evaluator_cd",
         update={
             "syllabus": response,
-            "llm_calls": state.get("llm_calls", 0) + 1,
             "evaluator": None,
+            **stage,
         },
     )
 
 
-def evaluator_cd(state: MessagesState):
-    print("evaluator_cd")
+@usage.node
+async def evaluator_cd(state: MessagesState):
+    _progress("node_started", node="evaluator_cd")
 
-    model_eval = model.with_structured_output(EvaluatorOutput)
     syllabus = state.get("syllabus")
 
     if not syllabus:
@@ -178,18 +475,13 @@ def evaluator_cd(state: MessagesState):
         SystemMessage(
             content=prompt_manager.get_evaluator_cd_prompt(
                 syllabus,
-                "\n".join(
-                    [
-                        msg.content
-                        for msg in state.get("messages")
-                        if hasattr(msg, "content")
-                    ]
-                ),
+                _history_text(state, "evaluator_cd"),
             )
         )
     ]
 
-    response = model_eval.invoke(prompt)
+    response = await _invoke_structured(EvaluatorOutput, prompt)
+    retry, stage = _review_stage(state, "curriculum_designer", "syllabus", response)
 
     feedback_state = (
         {
@@ -197,93 +489,309 @@ def evaluator_cd(state: MessagesState):
             "feedback": response.get("feedback"),
             "agent": "curriculum_designer",
         }
-        if response.get("retry")
+        if retry
         else None
     )
 
     return Command(
         goto="curriculum_designer" if feedback_state else "lesson_author",
-        update={"evaluator": feedback_state},
+        update={"evaluator": feedback_state, **stage},
     )
 
 
-def lesson_author(state: MessagesState):
-    print("lesson_author")
-    course_model = model.with_structured_output(CourseOutput)
-    chapter_model = model.with_structured_output(Chapter)
-    lesson_model = model.with_structured_output(Lesson)
+def _as_model(schema, raw):
+    return schema(**raw) if isinstance(raw, dict) else raw
+
+
+def _syllabus_chapter(syllabus: Syllabus, index: int) -> dict:
+    chapters = syllabus.get("chapters", []) or []
+    return chapters[index] if index < len(chapters) else {}
 
-    syllabus = state.get("syllabus")
 
-    prompt = [SystemMessage(content=prompt_manager.get_course_output_prompt(syllabus))]
-    course_output_raw = course_model.invoke(prompt)
-    course_output = (
-        CourseOutput(**course_output_raw)
-        if isinstance(course_output_raw, dict)
-        else course_output_raw
+def _planned_chapters_summary(syllabus: Syllabus, index: int, total: int) -> str:
+    """Context for a chapter generated in parallel with its siblings.
+
+    Siblings are not generated yet, so the chapter is anchored to its slot
+    in the syllabus instead of the summary of previously generated chapters.
+    """
+    chapter_template = _syllabus_chapter(syllabus, index)
+    return (
+        "\n- Generated in parallel with the other chapters"
+        f"\n- You are generating chapter {index + 1} of {total}"
+        f"\n- Syllabus outline for this chapter: {chapter_template.get('overview', 'N/A')}"
     )
 
-    chapters = []
-    generated_chapters_summary = ""
 
-    for i in range(course_output.chapter_count):
-        chapter_prompt = [
-            SystemMessage(
-                content=prompt_manager.get_chapter_output_prompt(
-                    syllabus, course_output.model_dump(), generated_chapters_summary
-                )
-            )
-        ]
-        chapter_raw = chapter_model.invoke(chapter_prompt)
-        chapter = (
-            Chapter(**chapter_raw) if isinstance(chapter_raw, dict) else chapter_raw
+def _planned_lessons_summary(chapter_template: dict, index: int, total: int) -> str:
+    """Context for a lesson generated in parallel with its siblings."""
+    planned = chapter_template.get("lessons", []) or []
+    lines = [
+        "\n- Generated in parallel with the other lessons",
+        f"\n- You are generating lesson {index + 1} of {total}",
+    ]
+    if index < len(planned):
+        lines.append(
+            f"\n- Syllabus outline for this lesson: {planned[index].get('overview', '')}"
+            f" (Type: {planned[index].get('type', 'text')})"
         )
+    lines.extend(
+        f"\n- Sibling lesson {i + 1}: {lesson.get('overview', '')}"
+        for i, lesson in enumerate(planned)
+        if i != index
+    )
+    return "".join(lines)
 
-        lessons = []
-        generated_lessons_summary = ""
-
-        for j in range(chapter.lesson_count):
-            lesson_prompt = [
-                SystemMessage(
-                    content=prompt_manager.get_lesson_output_prompt(
-                        syllabus, chapter.model_dump(), generated_lessons_summary
-                    )
-                )
-            ]
-            lesson_raw = lesson_model.invoke(lesson_prompt)
-            lesson = (
-                Lesson(**lesson_raw) if isinstance(lesson_raw, dict) else lesson_raw
-            )
-            lessons.append(lesson)
 
-            generated_lessons_summary += (
-                f"\n- Lesson {j+1}: {lesson.title} ({lesson.type})"
-            )
+def _fan_out_lessons(payload: dict, chapter: dict) -> list[Send]:
+    """Sends for the lessons of an authored chapter.
 
-        chapter.lessons = lessons
-        chapters.append(chapter)
-
-        generated_chapters_summary += (
-            f"\n- Ch {i+1}: {chapter.title} ({len(lessons)} lessons)"
+    Sequential mode sends only the next lesson, the lesson writer then sends
+    the one after it, so every lesson sees its predecessors in its prompt.
+    """
+    lessons = [
+        Send(
+            "lesson_writer",
+            {**payload, "chapter": chapter, "lesson_index": j, "lessons_summary": ""},
         )
+        for j in range(chapter["lesson_count"])
+    ]
 
-    course = Course(
+    if LESSON_AUTHOR_MODE == "sequential":
+        return lessons[:1]
+
+    return lessons
+
+
+def _syllabus_text(payload: dict) -> str:
+    # Payloads checkpointed before the rendered text was added carry only the
+    # syllabus.
+    return (
+        payload.get("syllabus_text")
+        or prompt_manager.render_syllabus(payload["syllabus"]).text
+    )
+
+
+def _next_chapter(payload: dict, chapters_summary: str) -> Send | str:
+    next_index = payload["chapter_index"] + 1
+
+    if next_index >= payload["course_outline"]["chapter_count"]:
+        return "course_assembler"
+
+    return Send(
+        "chapter_author",
+        {**payload, "chapter_index": next_index, "chapters_summary": chapters_summary},
+    )
+
+
+@usage.node
+async def lesson_author(state: MessagesState):
+    """Outline the course and fan out to ``chapter_author``.
+
+    Chapters and lessons are authored by their own graph tasks, so each one
+    is checkpointed as soon as it is generated and a failed run resumes
+    from the items that are still missing.
+    """
+    _progress("node_started", node="lesson_author")
+    syllabus = state.get("syllabus")
+    rendered_syllabus = prompt_manager.render_syllabus(syllabus)
+
+    prompt = [
+        SystemMessage(
+            content=prompt_manager.get_course_output_prompt(rendered_syllabus)
+        )
+    ]
+    course_output = _as_model(
+        CourseOutput, await _invoke_structured(CourseOutput, prompt, "course")
+    )
+    _progress(
+        "course_outlined",
         title=course_output.title,
-        description=course_output.description,
         chapter_count=course_output.chapter_count,
-        chapters=chapters,
     )
 
+    payload = {
+        "syllabus": syllabus,
+        "syllabus_text": rendered_syllabus.text,
+        "course_outline": course_output.model_dump(),
+        "chapters_summary": "",
+    }
+    chapters = [
+        Send("chapter_author", {**payload, "chapter_index": i})
+        for i in range(course_output.chapter_count)
+    ]
+
+    if LESSON_AUTHOR_MODE == "sequential":
+        chapters = chapters[:1]
+
     return Command(
-        goto=END,
+        goto=chapters or "course_assembler",
         update={
-            "course": course.model_dump(),
-            "llm_calls": state.get("llm_calls", 0) + 1,
+            "course_outline": course_output.model_dump(),
+            "authored_chapters": None,
+            "authored_lessons": None,
+            "completed_chapters": None,
         },
     )
 
 
-# def evaluator_la(state: MessagesState):
+@usage.node
+async def chapter_author(payload: dict):
+    i = payload["chapter_index"]
+    course_outline = payload["course_outline"]
+
+    if LESSON_AUTHOR_MODE == "sequential":
+        chapters_summary = payload["chapters_summary"]
+    else:
+        chapters_summary = _planned_chapters_summary(
+            payload["syllabus"], i, course_outline["chapter_count"]
+        )
+
+    prompt = [
+        SystemMessage(
+            content=prompt_manager.get_chapter_output_prompt(
+                _syllabus_text(payload), course_outline, chapters_summary
+            )
+        )
+    ]
+    # Only the chapter metadata is generated here, the lessons are authored
+    # by lesson_writer.
+    chapter_output = _as_model(
+        ChapterOutput,
+        await _invoke_structured(ChapterOutput, prompt, cache_scope=f"chapter:{i + 1}"),
+    )
+    chapter = {**chapter_output.model_dump(), "display_order": i + 1, "lessons": []}
+
+    goto = _fan_out_lessons(payload, chapter)
+
+    if not goto and LESSON_AUTHOR_MODE == "sequential":
+        _progress(
+            "chapter_completed",
+            chapter=i + 1,
+            chapter_count=course_outline["chapter_count"],
+        )
+        goto = _next_chapter(
+            payload,
+            f"{chapters_summary}\n- Ch {i + 1}: {chapter['title']} (0 lessons)",
+        )
+    elif not goto:
+        goto = "course_assembler"
+
+    return Command(goto=goto, update={"authored_chapters": {str(i): chapter}})
+
+
+@usage.node
+async def lesson_writer(payload: dict):
+    i = payload["chapter_index"]
+    j = payload["lesson_index"]
+    chapter = payload["chapter"]
+
+    if LESSON_AUTHOR_MODE == "sequential":
+        lessons_summary = payload["lessons_summary"]
+    else:
+        lessons_summary = _planned_lessons_summary(
+            _syllabus_chapter(payload["syllabus"], i), j, chapter["lesson_count"]
+        )
+
+    prompt = [
+        SystemMessage(
+            content=prompt_manager.get_lesson_output_prompt(
+                _syllabus_text(payload), chapter, lessons_summary
+            )
+        )
+    ]
+    lesson = _as_model(
+        Lesson,
+        await _invoke_structured(
+            Lesson, prompt, cache_scope=f"chapter:{i + 1}:lesson:{j + 1}"
+        ),
+    )
+    lesson.display_order = j + 1
+    _progress(
+        "lesson_completed",
+        chapter=i + 1,
+        lesson=j + 1,
+        lesson_count=chapter["lesson_count"],
+    )
+
+    update = {"authored_lessons": {f"{i}:{j}": lesson.model_dump()}}
+
+    if LESSON_AUTHOR_MODE != "sequential":
+        return Command(goto="course_assembler", update=update)
+
+    lessons_summary += f"\n- Lesson {j + 1}: {lesson.title} ({lesson.type})"
+
+    if j + 1 < chapter["lesson_count"]:
+        goto = Send(
+            "lesson_writer",
+            {**payload, "lesson_index": j + 1, "lessons_summary": lessons_summary},
+        )
+    else:
+        _progress(
+            "chapter_completed",
+            chapter=i + 1,
+            chapter_count=payload["course_outline"]["chapter_count"],
+        )
+        goto = _next_chapter(
+            payload,
+            f"{payload['chapters_summary']}\n- Ch {i + 1}: {chapter['title']}"
+            f" ({chapter['lesson_count']} lessons)",
+        )
+
+    return Command(goto=goto, update=update)
+
+
+@usage.node
+async def course_assembler(state: MessagesState):
+    """Build ``course`` once every authored chapter and lesson is in state.
+
+    In concurrent mode every chapter and lesson task routes here, so
+    incomplete states are skipped; the last branch to finish assembles the
+    course. Each run reports the chapters whose last lesson just finished.
+    """
+    course_outline = state.get("course_outline")
+    authored_chapters = state.get("authored_chapters") or {}
+    authored_lessons = state.get("authored_lessons") or {}
+    completed_chapters = state.get("completed_chapters") or {}
+
+    chapters = []
+    newly_completed = {}
+    for i in range(course_outline["chapter_count"]):
+        chapter = authored_chapters.get(str(i))
+        if chapter is None:
+            continue
+
+        lessons = [
+            authored_lessons.get(f"{i}:{j}") for j in range(chapter["lesson_count"])
+        ]
+        if None in lessons:
+            continue
+
+        chapters.append(Chapter(**{**chapter, "lessons": lessons}))
+
+        if LESSON_AUTHOR_MODE != "sequential" and str(i) not in completed_chapters:
+            newly_completed[str(i)] = True
+            _progress(
+                "chapter_completed",
+                chapter=i + 1,
+                chapter_count=course_outline["chapter_count"],
+            )
+
+    update = {"completed_chapters": newly_completed} if newly_completed else {}
+
+    if len(chapters) < course_outline["chapter_count"]:
+        return update
+
+    course = Course(
+        title=course_outline["title"],
+        description=course_outline["description"],
+        chapter_count=course_outline["chapter_count"],
+        chapters=chapters,
+    )
+
+    return Command(goto=END, update={**update, "course": course.model_dump()})
+
+
+# async def evaluator_la(state: MessagesState):
 #     print("evaluator_la")
 #
 #     model_eval = model.with_structured_output(EvaluatorOutput)
@@ -310,7 +818,7 @@ def lesson_author(state: MessagesState):
 #         )
 #     ]
 #
-#     response = model_eval.invoke(prompt)
+#     response = await model_eval.ainvoke(prompt)
 #
 #     feedback_state = (
 #         {
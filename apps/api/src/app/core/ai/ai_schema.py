@@ -46,6 +46,9 @@ class AnalyzedData(TypedDict):
 
 class EvaluatorOutput(TypedDict):
     feedback: Annotated[str, "Feedback of what to improve"]
+    score: Annotated[
+        int, "Overall quality of the evaluated output, from 1 (unusable) to 10"
+    ]
     retry: Annotated[
         bool,
         "Set to True if data is invalid, incomplete, or needs to be redone or something is missing",
@@ -158,13 +161,44 @@ class CourseRevision(TypedDict):
     course: Course
 
 
+class RetryBudget(TypedDict, total=False):
+    max_iterations: int
+    max_tokens: int
+    max_seconds: float
+
+
+class StageAttempts(TypedDict):
+    iterations: int
+    tokens_at_start: int
+    started_at: float
+    best: Optional[Any]
+    best_score: Optional[int]
+
+
+def merge_authored(left: dict | None, right: dict | None) -> dict:
+    """Reducer for items authored by parallel graph tasks, ``None`` resets."""
+    if right is None:
+        return {}
+
+    return {**(left or {}), **right}
+
+
 class MessagesState(TypedDict):
     messages: Annotated[List[AnyMessage], operator.add]
+    history_summary: Optional[str]
+    summarized_messages: Optional[int]
     analyzed_data: Optional[AnalyzedData]
     evaluator: Optional[EvaluatorData]
     syllabus: Optional[Syllabus]
+    course_outline: Optional[dict]
+    authored_chapters: Annotated[dict, merge_authored]
+    authored_lessons: Annotated[dict, merge_authored]
+    completed_chapters: Annotated[dict, merge_authored]
     course: Optional[Course]
-    llm_calls: Optional[int]
+    retry_budget: Optional[RetryBudget]
+    stage_attempts: Optional[dict[str, StageAttempts]]
+    llm_calls: Annotated[int, operator.add]
+    llm_tokens: Annotated[int, operator.add]
 
 
 class Message(BaseModel):
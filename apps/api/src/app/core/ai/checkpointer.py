@@ -0,0 +1,113 @@
+import logging
+import os
+import weakref
+
+from dotenv import load_dotenv
+from prometheus_client import REGISTRY
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from psycopg.rows import dict_row
+from psycopg_pool import AsyncConnectionPool
+
+from src.app.core.telemetry import instrument_connection
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+POOL_MIN_SIZE = int(os.getenv("CHECKPOINTER_POOL_MIN_SIZE", "2"))
+POOL_MAX_SIZE = int(os.getenv("CHECKPOINTER_POOL_MAX_SIZE", "20"))
+POOL_TIMEOUT = float(os.getenv("CHECKPOINTER_POOL_TIMEOUT", "30"))
+POOL_MAX_IDLE = float(os.getenv("CHECKPOINTER_POOL_MAX_IDLE", "300"))
+POOL_MAX_LIFETIME = float(os.getenv("CHECKPOINTER_POOL_MAX_LIFETIME", "3600"))
+POOL_RECONNECT_TIMEOUT = float(os.getenv("CHECKPOINTER_POOL_RECONNECT_TIMEOUT", "300"))
+
+# psycopg_pool stats exported as checkpointer_pool_{stat}. The current state of
+# the pool is a gauge, the rest count since the pool was opened.
+POOL_GAUGES = {
+    "pool_min": "Minimum number of connections",
+    "pool_max": "Maximum number of connections",
+    "pool_size": "Connections in the pool or handed out",
+    "pool_available": "Idle connections in the pool",
+    "requests_waiting": "Requests waiting for a connection",
+}
+POOL_COUNTERS = {
+    "requests_num": "Connection requests",
+    "requests_queued": "Connection requests that had to wait",
+    "requests_errors": "Connection requests that failed",
+    "requests_wait_ms": "Time spent waiting for a connection in milliseconds",
+    "usage_ms": "Time connections were handed out in milliseconds",
+    "returns_bad": "Connections returned in a bad state",
+    "connections_num": "Connection attempts to the database",
+    "connections_errors": "Failed connection attempts",
+    "connections_lost": "Connections found broken by the health check",
+    "connections_ms": "Time spent connecting in milliseconds",
+}
+
+_pools: weakref.WeakSet[AsyncConnectionPool] = weakref.WeakSet()
+
+
+def _reconnect_failed(pool: AsyncConnectionPool):
+    logger.error(
+        "Checkpointer pool %s could not reconnect within %ss",
+        pool.name,
+        POOL_RECONNECT_TIMEOUT,
+    )
+
+
+def create_checkpointer_pool(conninfo: str) -> AsyncConnectionPool:
+    """Connection pool backing the LangGraph AsyncPostgresSaver.
+
+    Connections are health checked when handed out, replaced when broken and
+    the pool keeps trying to reconnect in the background if the database goes
+    away. The pool is created closed, call ``await pool.open()`` to start it.
+    """
+    pool = AsyncConnectionPool(
+        conninfo=conninfo,
+        min_size=POOL_MIN_SIZE,
+        max_size=POOL_MAX_SIZE,
+        timeout=POOL_TIMEOUT,
+        max_idle=POOL_MAX_IDLE,
+        max_lifetime=POOL_MAX_LIFETIME,
+        reconnect_timeout=POOL_RECONNECT_TIMEOUT,
+        reconnect_failed=_reconnect_failed,
+        check=AsyncConnectionPool.check_connection,
+        configure=instrument_connection,
+        kwargs={"autocommit": True, "prepare_threshold": 0, "row_factory": dict_row},
+        name="langgraph-checkpointer",
+        open=False,
+    )
+    _pools.add(pool)
+
+    return pool
+
+
+class _PoolCollector:
+    """Reports the stats of the open checkpointer pools on ``/metrics``."""
+
+    def collect(self):
+        gauges = {
+            stat: GaugeMetricFamily(
+                f"checkpointer_pool_{stat}", documentation, labels=["pool"]
+            )
+            for stat, documentation in POOL_GAUGES.items()
+        }
+        counters = {
+            stat: CounterMetricFamily(
+                f"checkpointer_pool_{stat}", documentation, labels=["pool"]
+            )
+            for stat, documentation in POOL_COUNTERS.items()
+        }
+
+        for pool in list(_pools):
+            if pool.closed:
+                continue
+
+            stats = pool.get_stats()
+            for stat, metric in {**gauges, **counters}.items():
+                metric.add_metric([pool.name], stats.get(stat, 0))
+
+        yield from gauges.values()
+        yield from counters.values()
+
+
+REGISTRY.register(_PoolCollector())
@@ -0,0 +1,344 @@
+import asyncio
+import json
+import logging
+import os
+import uuid
+from typing import AsyncIterator
+
+import redis.asyncio as redis
+from dotenv import load_dotenv
+from fastapi import HTTPException
+
+from src.app.core.ai.stream import data_part
+from src.app.core.workers import acquire_slot
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# A run whose worker stopped renewing its lease for this long is handed to
+# another worker, which resumes it from the last checkpoint.
+GENERATION_RUN_LEASE_SECONDS = int(os.getenv("GENERATION_RUN_LEASE_SECONDS", "30"))
+GENERATION_RUN_MAX_ATTEMPTS = int(os.getenv("GENERATION_RUN_MAX_ATTEMPTS", "3"))
+GENERATION_RUN_TTL_SECONDS = int(os.getenv("GENERATION_RUN_TTL_SECONDS", "3600"))
+# The chat request stops listening (the run continues) after this much silence.
+GENERATION_STREAM_IDLE_SECONDS = float(
+    os.getenv("GENERATION_STREAM_IDLE_SECONDS", "300")
+)
+GENERATION_WORKER_CONCURRENCY = int(os.getenv("GENERATION_WORKER_CONCURRENCY", "4"))
+
+QUEUE_KEY = "generation_runs:queue"
+PROCESSING_KEY = "generation_runs:processing"
+
+
+class GenerationRunQueue:
+    """Redis queue of graph runs, one run per chat message.
+
+    The API enqueues a run and relays its events from the
+    ``generation_run:{id}:events`` channel. Workers move claimed runs to a
+    processing list and keep a lease key alive while running them; runs whose
+    lease expired are put back on the queue by ``requeue_stale``. Only one run
+    per thread is allowed at a time, runs made inline in the chat request
+    reserve the thread too (``hold``).
+    """
+
+    def __init__(self, redis_client: redis.Redis):
+        self.redis_client = redis_client
+
+    async def reserve(self, thread_id: str) -> str:
+        """Take the thread for a new run, returning the run id.
+
+        Called before the chat response starts so a conflict is still a 409.
+        The reservation expires after a lease unless ``stream`` enqueues the
+        run, e.g. when the client disconnected before the stream started.
+        """
+        run_id = uuid.uuid4().hex
+
+        if not await self.redis_client.set(
+            self._thread_key(thread_id),
+            run_id,
+            nx=True,
+            ex=GENERATION_RUN_LEASE_SECONDS,
+        ):
+            raise HTTPException(status_code=409, detail="GENERATION_IN_PROGRESS")
+
+        return run_id
+
+    async def stream(
+        self, thread_id: str, run_id: str, message: str, resume: bool
+    ) -> AsyncIterator[str]:
+        """Enqueue a reserved run and yield its stream events."""
+        pubsub = self.redis_client.pubsub()
+
+        try:
+            # Subscribe before enqueueing, pub/sub does not replay messages.
+            await pubsub.subscribe(self._channel(run_id))
+
+            async with self.redis_client.pipeline(transaction=True) as pipe:
+                pipe.hset(
+                    self._run_key(run_id),
+                    mapping={
+                        "threadId": thread_id,
+                        "message": message,
+                        "resume": int(resume),
+                        "attempts": 0,
+                    },
+                )
+                pipe.expire(self._run_key(run_id), GENERATION_RUN_TTL_SECONDS)
+                pipe.expire(self._thread_key(thread_id), GENERATION_RUN_TTL_SECONDS)
+                pipe.lpush(QUEUE_KEY, run_id)
+                await pipe.execute()
+
+            async for event in self._listen(pubsub):
+                yield event
+        except BaseException:
+            # Nothing was enqueued if subscribing failed, free the thread.
+            if not await self.redis_client.exists(self._run_key(run_id)):
+                await self._release_lock(thread_id, run_id)
+            raise
+        finally:
+            await pubsub.unsubscribe()
+            await pubsub.aclose()
+
+    async def hold(
+        self, thread_id: str, run_id: str, events: AsyncIterator[str]
+    ) -> AsyncIterator[str]:
+        """Relay a reserved run made in the request itself (inline mode),
+        keeping the thread reserved until it ends."""
+        renew = asyncio.create_task(self._renew_lock(thread_id, run_id))
+
+        try:
+            async for event in events:
+                yield event
+        finally:
+            renew.cancel()
+            await self._release_lock(thread_id, run_id)
+
+    async def _renew_lock(self, thread_id: str, run_id: str):
+        lock_key = self._thread_key(thread_id)
+
+        while True:
+            await asyncio.sleep(GENERATION_RUN_LEASE_SECONDS / 3)
+
+            if _decode(await self.redis_client.get(lock_key)) != run_id:
+                return
+
+            await self.redis_client.expire(lock_key, GENERATION_RUN_LEASE_SECONDS)
+
+    async def _listen(self, pubsub) -> AsyncIterator[str]:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + GENERATION_STREAM_IDLE_SECONDS
+
+        while loop.time() < deadline:
+            message = await pubsub.get_message(
+                ignore_subscribe_messages=True, timeout=1.0
+            )
+            if message is None:
+                continue
+
+            deadline = loop.time() + GENERATION_STREAM_IDLE_SECONDS
+            event = json.loads(message["data"])
+
+            if "chunk" in event:
+                yield event["chunk"]
+                continue
+
+            if event.get("error"):
+                yield data_part({"event": "error", "detail": event["error"]})
+
+            return
+
+        yield data_part({"event": "generation_detached"})
+
+    async def claim(self, timeout: int = 5) -> dict | None:
+        run_id = await self.redis_client.blmove(
+            QUEUE_KEY, PROCESSING_KEY, timeout, "RIGHT", "LEFT"
+        )
+
+        if run_id is None:
+            return None
+
+        run_id = _decode(run_id)
+        await self.heartbeat(run_id)
+
+        async with self.redis_client.pipeline(transaction=True) as pipe:
+            pipe.hincrby(self._run_key(run_id), "attempts", 1)
+            pipe.hincrby(self._run_key(run_id), "claims", 1)
+            pipe.hgetall(self._run_key(run_id))
+            attempts, claims, raw = await pipe.execute()
+
+        data = {_decode(key): _decode(value) for key, value in raw.items()}
+
+        if "threadId" not in data:
+            await self.redis_client.lrem(PROCESSING_KEY, 0, run_id)
+            await self.redis_client.delete(
+                self._lease_key(run_id), self._run_key(run_id)
+            )
+            return None
+
+        return {
+            "id": run_id,
+            "threadId": data["threadId"],
+            "message": data["message"],
+            "resume": data["resume"] == "1",
+            "attempts": attempts,
+            # Claimed before, so its checkpoint may already hold the message.
+            "recovered": claims > 1,
+        }
+
+    async def heartbeat(self, run_id: str):
+        await self.redis_client.set(
+            self._lease_key(run_id), 1, ex=GENERATION_RUN_LEASE_SECONDS
+        )
+
+    async def publish(self, run_id: str, chunk: str):
+        await self.redis_client.publish(
+            self._channel(run_id), json.dumps({"chunk": chunk})
+        )
+
+    async def finish(self, run: dict, error: str | None = None):
+        await self.redis_client.publish(
+            self._channel(run["id"]), json.dumps({"done": True, "error": error})
+        )
+
+        async with self.redis_client.pipeline(transaction=True) as pipe:
+            pipe.lrem(PROCESSING_KEY, 0, run["id"])
+            pipe.delete(self._lease_key(run["id"]), self._run_key(run["id"]))
+            await pipe.execute()
+
+        await self._release_lock(run["threadId"], run["id"])
+
+    async def requeue(self, run_id: str, count_attempt: bool = True):
+        """Put a claimed run back at the front of the queue.
+
+        Without ``count_attempt`` the claim is not counted towards
+        GENERATION_RUN_MAX_ATTEMPTS, for runs interrupted by a worker shutdown
+        rather than failing.
+        """
+        if await self.redis_client.lrem(PROCESSING_KEY, 0, run_id):
+            if not count_attempt:
+                await self.redis_client.hincrby(self._run_key(run_id), "attempts", -1)
+            await self.redis_client.rpush(QUEUE_KEY, run_id)
+
+        await self.redis_client.delete(self._lease_key(run_id))
+
+    async def requeue_stale(self):
+        for run_id in await self.redis_client.lrange(PROCESSING_KEY, 0, -1):
+            run_id = _decode(run_id)
+
+            if not await self.redis_client.exists(self._lease_key(run_id)):
+                logger.warning("Generation run %s lost its worker, requeueing", run_id)
+                await self.requeue(run_id)
+
+    async def _release_lock(self, thread_id: str, run_id: str):
+        lock_key = self._thread_key(thread_id)
+        if _decode(await self.redis_client.get(lock_key)) == run_id:
+            await self.redis_client.delete(lock_key)
+
+    @staticmethod
+    def _run_key(run_id: str) -> str:
+        return f"generation_run:{run_id}"
+
+    @staticmethod
+    def _lease_key(run_id: str) -> str:
+        return f"generation_run:{run_id}:lease"
+
+    @staticmethod
+    def _channel(run_id: str) -> str:
+        return f"generation_run:{run_id}:events"
+
+    @staticmethod
+    def _thread_key(thread_id: str) -> str:
+        return f"generation_run:thread:{thread_id}"
+
+
+class GenerationWorker:
+    """Runs queued graph runs through ``AiService.run_generation``."""
+
+    def __init__(
+        self,
+        queue: GenerationRunQueue,
+        ai_service,
+        concurrency: int = GENERATION_WORKER_CONCURRENCY,
+    ):
+        self.queue = queue
+        self.ai_service = ai_service
+        self.concurrency = concurrency
+
+        self._stopping = asyncio.Event()
+
+    def stop(self):
+        self._stopping.set()
+
+    async def run(self):
+        slots = asyncio.Semaphore(self.concurrency)
+        running: dict[asyncio.Task, str] = {}
+        reaper = asyncio.create_task(self._reap())
+
+        try:
+            while await acquire_slot(slots, self._stopping):
+                run = await self.queue.claim()
+                if run is None:
+                    slots.release()
+                    continue
+
+                if self._stopping.is_set():
+                    # Stopped while waiting for a run, leave it to another
+                    # worker.
+                    await self.queue.requeue(run["id"], count_attempt=False)
+                    slots.release()
+                    break
+
+                task = asyncio.create_task(self.process(run))
+                running[task] = run["id"]
+                task.add_done_callback(lambda t: running.pop(t, None))
+                task.add_done_callback(lambda _: slots.release())
+        finally:
+            reaper.cancel()
+
+            # Hand unfinished runs straight to another worker, which resumes
+            # them from their last checkpoint.
+            for task, run_id in list(running.items()):
+                task.cancel()
+                await self.queue.requeue(run_id, count_attempt=False)
+
+            await asyncio.gather(reaper, *running, return_exceptions=True)
+
+    async def process(self, run: dict):
+        heartbeat = asyncio.create_task(self._heartbeat(run["id"]))
+
+        try:
+            if run["attempts"] > GENERATION_RUN_MAX_ATTEMPTS:
+                await self.queue.finish(run, error="GENERATION_FAILED")
+                return
+
+            async for chunk in self.ai_service.run_generation(
+                run["threadId"],
+                run["message"],
+                resume=run["resume"],
+                recovered=run["recovered"],
+            ):
+                await self.queue.publish(run["id"], chunk)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.exception("Generation run %s failed", run["id"])
+            await self.queue.finish(run, error=str(e) or e.__class__.__name__)
+        else:
+            await self.queue.finish(run)
+        finally:
+            heartbeat.cancel()
+
+    async def _heartbeat(self, run_id: str):
+        while True:
+            await asyncio.sleep(GENERATION_RUN_LEASE_SECONDS / 3)
+            await self.queue.heartbeat(run_id)
+
+    async def _reap(self):
+        while True:
+            await self.queue.requeue_stale()
+            await asyncio.sleep(GENERATION_RUN_LEASE_SECONDS)
+
+
+def _decode(value):
+    return value.decode() if isinstance(value, bytes) else value
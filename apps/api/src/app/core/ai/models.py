@@ -0,0 +1,139 @@
+import functools
+import json
+import os
+import uuid
+from typing import Any
+
+from dotenv import load_dotenv
+from langchain.chat_models import init_chat_model
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.messages.utils import count_tokens_approximately
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from langgraph.config import get_config
+
+load_dotenv()
+
+OFFLINE_MODEL = "offline"
+
+DEFAULT_MODEL = os.getenv("LLM_DEFAULT_MODEL", "openai:gpt-4.1-mini")
+
+# Yes/no judgments and short chapter metadata run on a cheaper, faster model
+# than the authoring nodes. Override per node with LLM_NODE_MODELS, e.g.
+# '{"evaluator_oa": "openai:gpt-4.1-mini"}'; "offline" selects the
+# OfflineChatModel stand-in. Nodes that are not listed use DEFAULT_MODEL.
+NODE_MODELS = {
+    "evaluator_oa": os.getenv("LLM_EVALUATOR_MODEL", "openai:gpt-4.1-nano"),
+    "evaluator_cd": os.getenv("LLM_EVALUATOR_MODEL", "openai:gpt-4.1-nano"),
+    "chapter_author": os.getenv("LLM_METADATA_MODEL", "openai:gpt-4.1-nano"),
+    **json.loads(os.getenv("LLM_NODE_MODELS", "{}")),
+}
+
+OFFLINE_ACTIVE = OFFLINE_MODEL in {DEFAULT_MODEL, *NODE_MODELS.values()}
+
+
+class OfflineChatModel(BaseChatModel):
+    """Deterministic stand-in model for tests and offline development.
+
+    Structured output calls get tool call arguments generated from the
+    schema (the first enum value, 2 for integers, two items per array,
+    ``False`` for booleans); ``responses`` overrides them per schema name.
+    Plain calls echo a short summary of the prompt.
+    """
+
+    responses: dict[str, dict] = {}
+
+    @property
+    def _llm_type(self) -> str:
+        return OFFLINE_MODEL
+
+    def bind_tools(self, tools, tool_choice=None, **kwargs):
+        return self.bind(tools=[convert_to_openai_tool(tool) for tool in tools])
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        tools = kwargs.get("tools")
+
+        if tools:
+            function = tools[0]["function"]
+            args = self.responses.get(function["name"]) or _stub(
+                function["parameters"], function["parameters"]
+            )
+            message = AIMessage(
+                content="",
+                tool_calls=[
+                    {
+                        "name": function["name"],
+                        "args": args,
+                        "id": f"call_{uuid.uuid4().hex}",
+                    }
+                ],
+            )
+            output = json.dumps(args)
+        else:
+            output = f"Offline response to {len(messages)} messages."
+            message = AIMessage(content=output)
+
+        input_tokens = count_tokens_approximately(messages)
+        output_tokens = count_tokens_approximately([AIMessage(content=output)])
+        message.usage_metadata = {
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+        }
+
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+def _stub(schema: dict, root: dict, name: str = "value") -> Any:
+    if "$ref" in schema:
+        schema = root["$defs"][schema["$ref"].split("/")[-1]]
+
+    for option in schema.get("anyOf") or []:
+        if option.get("type") != "null":
+            return _stub(option, root, name)
+
+    if "enum" in schema:
+        return schema["enum"][0]
+
+    schema_type = schema.get("type")
+
+    if schema_type == "object":
+        return {
+            key: _stub(value, root, key)
+            for key, value in (schema.get("properties") or {}).items()
+        }
+    if schema_type == "array":
+        return [_stub(schema.get("items") or {}, root, name) for _ in range(2)]
+    if schema_type == "integer":
+        return 2
+    if schema_type == "number":
+        return 2.0
+    if schema_type == "boolean":
+        return False
+
+    return f"Offline {name}"
+
+
+@functools.cache
+def get_model(name: str) -> BaseChatModel:
+    if name == OFFLINE_MODEL:
+        return OfflineChatModel()
+
+    return init_chat_model(name)
+
+
+def model_name_for(node: str) -> str:
+    return NODE_MODELS.get(node, DEFAULT_MODEL)
+
+
+def current_model() -> tuple[str, BaseChatModel]:
+    """Model name and instance configured for the running graph node."""
+    try:
+        node = (get_config().get("metadata") or {}).get("langgraph_node", "")
+    except RuntimeError:
+        node = ""
+
+    name = model_name_for(node)
+
+    return name, get_model(name)
@@ -1,14 +1,14 @@
+from dataclasses import dataclass
+
 from langchain_core.prompts import ChatPromptTemplate, PromptTemplate
 
 from src.app.core.ai.ai_schema import AnalyzedData, Syllabus, Course
 
+# Templates are parsed once at import; rendering goes through _render, which
+# skips the Runnable machinery of PromptTemplate.invoke.
 
-class PromptManager:
-
-    @staticmethod
-    def get_curator_prompt():
-        return ChatPromptTemplate.from_template(
-            """You are a course creation specialist gathering key course information.
+_CURATOR_PROMPT = ChatPromptTemplate.from_template(
+    """You are a course creation specialist gathering key course information.
 
             <analysis>
             Assess what the user knows:
@@ -40,13 +40,10 @@ class PromptManager:
             Never tell the user the current schema as you don't have the newest information. Say that it is available in "View generated course"
             
             Respond with reasoning, then answer."""
-        ).format()
+).format()
 
-    @staticmethod
-    def get_objective_architect_prompt(information_list: str = "", feedback: str = ""):
-        return (
-            PromptTemplate.from_template(
-                """<role>Objective Architect</role>
+_OBJECTIVE_ARCHITECT_TEMPLATE = PromptTemplate.from_template(
+    """<role>Objective Architect</role>
     <purpose>Transform course information into structured objectives aligned to Bloom's taxonomy.</purpose>
 
     <tasks>
@@ -69,15 +66,10 @@ class PromptManager:
     Feedback: {feedback}
 
     Input: {information_list}"""
-            )
-            .invoke({"information_list": information_list, "feedback": feedback})
-            .to_string()
-        )
+)
 
-    @staticmethod
-    def get_evaluator_oa_prompt(analyzed_data: AnalyzedData, messages: str = "") -> str:
-        prompt = PromptTemplate.from_template(
-            """<role>Evaluator</role>
+_EVALUATOR_OA_TEMPLATE = PromptTemplate.from_template(
+    """<role>Evaluator</role>
     <purpose>Assess analyzed data quality against completeness, consistency, and relevance.</purpose>
 
     <data>
@@ -104,53 +96,10 @@ class PromptManager:
     Conversation: {messages}
 
     Provide specific feedback and indicate if quality standards are met."""
-        )
+)
 
-        if not analyzed_data:
-            analyzed_data = {}
-
-        objectives_str = (
-            "\n".join(
-                [
-                    f"  - {obj['name']} (Bloom: {obj['bloom_tag']}, Smart: {obj['smart']})"
-                    for obj in analyzed_data.get("objectives", [])
-                ]
-            )
-            or "  N/A"
-        )
-        constraints_str = (
-            "\n".join(
-                [
-                    f"  - {c['type']}: {c['description']}"
-                    for c in analyzed_data.get("constraints", [])
-                ]
-            )
-            or "  N/A"
-        )
-
-        return prompt.invoke(
-            {
-                "topic": analyzed_data.get("topic", "N/A"),
-                "summary": analyzed_data.get("summary", "N/A"),
-                "tags": ", ".join(analyzed_data.get("tags", [])) or "N/A",
-                "prerequisites": ", ".join(analyzed_data.get("prerequisites", []))
-                or "N/A",
-                "learning_outcomes": ", ".join(
-                    analyzed_data.get("learning_outcomes", [])
-                )
-                or "N/A",
-                "difficulty": analyzed_data.get("difficulty", "N/A"),
-                "objectives": objectives_str,
-                "constraints": constraints_str,
-                "messages": messages,
-            }
-        ).to_string()
-
-    @staticmethod
-    def get_curriculum_designer_prompt(prd: str = ""):
-        return (
-            PromptTemplate.from_template(
-                """<role>Curriculum Designer</role>
+_CURRICULUM_DESIGNER_TEMPLATE = PromptTemplate.from_template(
+    """<role>Curriculum Designer</role>
     <purpose>Transform learning objectives into a balanced syllabus with progressive Bloom's taxonomy distribution.</purpose>
 
     <design>
@@ -182,15 +131,10 @@ class PromptManager:
     </validation>
 
     Input PRD: {prd}"""
-            )
-            .invoke({"prd": prd})
-            .to_string()
-        )
+)
 
-    @staticmethod
-    def get_evaluator_cd_prompt(syllabus: Syllabus, messages: str = "") -> str:
-        prompt = PromptTemplate.from_template(
-            """<role>Evaluator (Curriculum Designer)</role>
+_EVALUATOR_CD_TEMPLATE = PromptTemplate.from_template(
+    """<role>Evaluator (Curriculum Designer)</role>
     <purpose>Validate syllabus balance, Bloom progression, lesson distribution. Propose corrections and return adjusted syllabus JSON + issues list.</purpose>
 
     <input>
@@ -211,47 +155,10 @@ class PromptManager:
     Conversation: {messages}
 
     Return corrected syllabus JSON + issues list only."""
-        )
-
-        if not syllabus:
-            syllabus = {}
-
-        chapters_list = syllabus.get("chapters", []) or []
-        if not chapters_list:
-            chapters_str = "  N/A"
-        else:
-            parts = []
-            for idx, ch in enumerate(chapters_list, start=1):
-                lessons = ch.get("lessons", []) or []
-                lesson_lines = (
-                    "\n".join(
-                        [
-                            f"      - {i+1}. type: {lesson.get('type','N/A')}, bloom: {lesson.get('bloom','N/A')}, overview: {lesson.get('overview','N/A')}"
-                            for i, lesson in enumerate(lessons)
-                        ]
-                    )
-                    or "      N/A"
-                )
-                parts.append(
-                    f"  Chapter {idx}:\n    overview: {ch.get('overview','N/A')}\n    bloom: {ch.get('bloom','N/A')}\n    difficulty: {ch.get('difficulty','N/A')}\n    lessons:\n{lesson_lines}"
-                )
-            chapters_str = "\n\n".join(parts)
+)
 
-        return prompt.invoke(
-            {
-                "chapters": chapters_str,
-                "reason": syllabus.get("reason", "N/A"),
-                "feedback": syllabus.get("feedback", "N/A"),
-                "messages": messages,
-            }
-        ).to_string()
-
-    @staticmethod
-    def get_course_output_prompt(syllabus: Syllabus) -> str:
-        syllabus_text = PromptManager._format_syllabus(syllabus)
-        return (
-            PromptTemplate.from_template(
-                """<role>Course Generator</role>
+_COURSE_OUTPUT_TEMPLATE = PromptTemplate.from_template(
+    """<role>Course Generator</role>
     <purpose>You are responsible for creating the course. Transform syllabus into minimal course metadata.</purpose>
 
     <responsibility>
@@ -268,43 +175,10 @@ class PromptManager:
     {syllabus}
 
     Output only valid JSON with CourseOutput schema."""
-            )
-            .invoke({"syllabus": syllabus_text})
-            .to_string()
-        )
+)
 
-    @staticmethod
-    def _format_syllabus(syllabus: Syllabus) -> str:
-        """Format Syllabus TypedDict into readable text for prompts."""
-        lines = []
-        lines.append(f"Reason: {syllabus.get('reason', '')}")
-        lines.append(f"Feedback: {syllabus.get('feedback', '')}\n")
-
-        chapters = syllabus.get("chapters", [])
-        lines.append(f"Total Chapters: {len(chapters)}\n")
-
-        for i, chapter in enumerate(chapters, 1):
-            lines.append(f"Chapter {i}: {chapter.get('overview', '')}")
-            lines.append(f"  - Bloom Level: {chapter.get('bloom', 1)}")
-            lines.append(f"  - Difficulty: {chapter.get('difficulty', 'medium')}")
-
-            lessons = chapter.get("lessons", [])
-            lines.append(f"  - Lessons ({len(lessons)}):")
-            for j, lesson in enumerate(lessons, 1):
-                lines.append(
-                    f"    {j}. {lesson.get('overview', '')} (Type: {lesson.get('type', 'text')}, Bloom: {lesson.get('bloom', 1)})"
-                )
-            lines.append("")
-
-        return "\n".join(lines)
-
-    @staticmethod
-    def get_chapter_output_prompt(
-        syllabus: Syllabus, course_output: dict = None, previous_chapters: str = ""
-    ) -> str:
-        syllabus_text = PromptManager._format_syllabus(syllabus)
-        template = PromptTemplate.from_template(
-            """<role>Course Generator</role>
+_CHAPTER_OUTPUT_TEMPLATE = PromptTemplate.from_template(
+    """<role>Course Generator</role>
     <purpose>You are responsible for creating the course chapters.</purpose>
 
     <output>
@@ -328,21 +202,10 @@ class PromptManager:
     Input Syllabus: {syllabus}
 
     Output only valid JSON."""
-        )
-        return template.format(
-            syllabus=syllabus_text,
-            course_title=course_output.get("title", "") if course_output else "",
-            chapter_count=course_output.get("chapter_count", 0) if course_output else 0,
-            previous_chapters=previous_chapters or " None yet",
-        )
+)
 
-    @staticmethod
-    def get_lesson_output_prompt(
-        syllabus: Syllabus, chapter: dict, previous_lessons: str = ""
-    ) -> str:
-        return (
-            PromptTemplate.from_template(
-                """<role>Course Generator</role>
+_LESSON_OUTPUT_TEMPLATE = PromptTemplate.from_template(
+    """<role>Course Generator</role>
     <purpose>You are responsible for creating individual lessons within a chapter. Transform chapter outlines into detailed lesson structures.</purpose>
 
     <responsibility>
@@ -366,23 +229,10 @@ class PromptManager:
     
     Input Syllabus: {syllabus}
     """
-            )
-            .invoke(
-                {
-                    "syllabus": PromptManager._format_syllabus(syllabus),
-                    "chapter_title": chapter.get("title", ""),
-                    "chapter_overview": chapter.get("overview", ""),
-                    "lesson_count": chapter.get("lesson_count", 0),
-                    "previous_lessons": previous_lessons or " None yet",
-                }
-            )
-            .to_string()
-        )
+)
 
-    @staticmethod
-    def get_evaluator_la_prompt(course: Course, messages: str = "") -> str:
-        prompt = PromptTemplate.from_template(
-            """<role>Evaluator (Lesson Author)</role>
+_EVALUATOR_LA_TEMPLATE = PromptTemplate.from_template(
+    """<role>Evaluator (Lesson Author)</role>
     <purpose>Validate course lesson quality, alignment, and readiness for publication.</purpose>
 
     <input>
@@ -405,8 +255,237 @@ class PromptManager:
     Conversation: {messages}
 
     Return corrected course JSON + issues list only."""
+)
+
+_HISTORY_SUMMARY_TEMPLATE = PromptTemplate.from_template(
+    """<role>Conversation Summarizer</role>
+    <purpose>Maintain a rolling summary of a course creation conversation.</purpose>
+
+    <rules>
+    - Keep every fact about the course: topic, audience, level, duration, constraints, preferences and decisions
+    - Drop greetings and small talk
+    - Merge the previous summary with the new messages, newer information wins
+    - At most 250 words
+    </rules>
+
+    Previous summary: {summary}
+
+    New messages:
+    {messages}"""
+)
+
+
+def _render(template: PromptTemplate, **kwargs) -> str:
+    """Render a precompiled f-string template.
+
+    Equivalent to ``template.invoke(kwargs).to_string()``; the template was
+    validated when it was compiled, so the string is formatted directly.
+    """
+    return template.template.format(**kwargs)
+
+
+@dataclass(frozen=True)
+class RenderedSyllabus:
+    """Syllabus rendered once for every prompt that embeds it.
+
+    ``text`` is the generator view used by the course/chapter/lesson prompts,
+    ``chapters_text`` the evaluator view. Build it with
+    ``PromptManager.render_syllabus``; the chapter and lesson tasks get
+    ``text`` in their ``Send`` payload instead of rendering it again.
+    """
+
+    text: str
+    chapters_text: str
+    reason: str
+    feedback: str
+
+
+class PromptManager:
+
+    @staticmethod
+    def get_curator_prompt():
+        return _CURATOR_PROMPT
+
+    @staticmethod
+    def get_history_summary_prompt(summary: str = "", messages: str = "") -> str:
+        return _render(
+            _HISTORY_SUMMARY_TEMPLATE,
+            summary=summary or "None yet",
+            messages=messages,
         )
 
+    @staticmethod
+    def get_objective_architect_prompt(information_list: str = "", feedback: str = ""):
+        return _render(
+            _OBJECTIVE_ARCHITECT_TEMPLATE,
+            information_list=information_list,
+            feedback=feedback,
+        )
+
+    @staticmethod
+    def get_evaluator_oa_prompt(analyzed_data: AnalyzedData, messages: str = "") -> str:
+        if not analyzed_data:
+            analyzed_data = {}
+
+        objectives_str = (
+            "\n".join(
+                [
+                    f"  - {obj['name']} (Bloom: {obj['bloom_tag']}, Smart: {obj['smart']})"
+                    for obj in analyzed_data.get("objectives", [])
+                ]
+            )
+            or "  N/A"
+        )
+        constraints_str = (
+            "\n".join(
+                [
+                    f"  - {c['type']}: {c['description']}"
+                    for c in analyzed_data.get("constraints", [])
+                ]
+            )
+            or "  N/A"
+        )
+
+        return _render(
+            _EVALUATOR_OA_TEMPLATE,
+            **{
+                "topic": analyzed_data.get("topic", "N/A"),
+                "summary": analyzed_data.get("summary", "N/A"),
+                "tags": ", ".join(analyzed_data.get("tags", [])) or "N/A",
+                "prerequisites": ", ".join(analyzed_data.get("prerequisites", []))
+                or "N/A",
+                "learning_outcomes": ", ".join(
+                    analyzed_data.get("learning_outcomes", [])
+                )
+                or "N/A",
+                "difficulty": analyzed_data.get("difficulty", "N/A"),
+                "objectives": objectives_str,
+                "constraints": constraints_str,
+                "messages": messages,
+            },
+        )
+
+    @staticmethod
+    def get_curriculum_designer_prompt(prd: str = ""):
+        return _render(_CURRICULUM_DESIGNER_TEMPLATE, prd=prd)
+
+    @staticmethod
+    def get_evaluator_cd_prompt(
+        syllabus: Syllabus | RenderedSyllabus, messages: str = ""
+    ) -> str:
+        rendered = PromptManager.render_syllabus(syllabus)
+
+        return _render(
+            _EVALUATOR_CD_TEMPLATE,
+            **{
+                "chapters": rendered.chapters_text,
+                "reason": rendered.reason,
+                "feedback": rendered.feedback,
+                "messages": messages,
+            },
+        )
+
+    @staticmethod
+    def get_course_output_prompt(syllabus: Syllabus | RenderedSyllabus) -> str:
+        syllabus_text = PromptManager.render_syllabus(syllabus).text
+        return _render(_COURSE_OUTPUT_TEMPLATE, syllabus=syllabus_text)
+
+    @staticmethod
+    def render_syllabus(syllabus: Syllabus | RenderedSyllabus) -> RenderedSyllabus:
+        """Render a syllabus for prompts; rendered syllabi pass through."""
+        if isinstance(syllabus, RenderedSyllabus):
+            return syllabus
+
+        if not syllabus:
+            syllabus = {}
+
+        return RenderedSyllabus(
+            text=PromptManager._format_syllabus(syllabus),
+            chapters_text=PromptManager._format_syllabus_chapters(syllabus),
+            reason=syllabus.get("reason", "N/A"),
+            feedback=syllabus.get("feedback", "N/A"),
+        )
+
+    @staticmethod
+    def _format_syllabus_chapters(syllabus: Syllabus) -> str:
+        """Format syllabus chapters for the curriculum evaluator."""
+        chapters_list = syllabus.get("chapters", []) or []
+        if not chapters_list:
+            chapters_str = "  N/A"
+        else:
+            parts = []
+            for idx, ch in enumerate(chapters_list, start=1):
+                lessons = ch.get("lessons", []) or []
+                lesson_lines = (
+                    "\n".join(
+                        [
+                            f"      - {i+1}. type: {lesson.get('type','N/A')}, bloom: {lesson.get('bloom','N/A')}, overview: {lesson.get('overview','N/A')}"
+                            for i, lesson in enumerate(lessons)
+                        ]
+                    )
+                    or "      N/A"
+                )
+                parts.append(
+                    f"  Chapter {idx}:\n    overview: {ch.get('overview','N/A')}\n    bloom: {ch.get('bloom','N/A')}\n    difficulty: {ch.get('difficulty','N/A')}\n    lessons:\n{lesson_lines}"
+                )
+            chapters_str = "\n\n".join(parts)
+
+        return chapters_str
+
+    @staticmethod
+    def _format_syllabus(syllabus: Syllabus) -> str:
+        """Format Syllabus TypedDict into readable text for prompts."""
+        lines = []
+        lines.append(f"Reason: {syllabus.get('reason', '')}")
+        lines.append(f"Feedback: {syllabus.get('feedback', '')}\n")
+
+        chapters = syllabus.get("chapters", [])
+        lines.append(f"Total Chapters: {len(chapters)}\n")
+
+        for i, chapter in enumerate(chapters, 1):
+            lines.append(f"Chapter {i}: {chapter.get('overview', '')}")
+            lines.append(f"  - Bloom Level: {chapter.get('bloom', 1)}")
+            lines.append(f"  - Difficulty: {chapter.get('difficulty', 'medium')}")
+
+            lessons = chapter.get("lessons", [])
+            lines.append(f"  - Lessons ({len(lessons)}):")
+            for j, lesson in enumerate(lessons, 1):
+                lines.append(
+                    f"    {j}. {lesson.get('overview', '')} (Type: {lesson.get('type', 'text')}, Bloom: {lesson.get('bloom', 1)})"
+                )
+            lines.append("")
+
+        return "\n".join(lines)
+
+    @staticmethod
+    def get_chapter_output_prompt(
+        syllabus_text: str,
+        course_output: dict = None,
+        previous_chapters: str = "",
+    ) -> str:
+        return _render(
+            _CHAPTER_OUTPUT_TEMPLATE,
+            syllabus=syllabus_text,
+            course_title=course_output.get("title", "") if course_output else "",
+            chapter_count=course_output.get("chapter_count", 0) if course_output else 0,
+            previous_chapters=previous_chapters or " None yet",
+        )
+
+    @staticmethod
+    def get_lesson_output_prompt(
+        syllabus_text: str, chapter: dict, previous_lessons: str = ""
+    ) -> str:
+        return _render(
+            _LESSON_OUTPUT_TEMPLATE,
+            syllabus=syllabus_text,
+            chapter_title=chapter.get("title", ""),
+            chapter_overview=chapter.get("overview", ""),
+            lesson_count=chapter.get("lesson_count", 0),
+            previous_lessons=previous_lessons or " None yet",
+        )
+
+    @staticmethod
+    def get_evaluator_la_prompt(course: Course, messages: str = "") -> str:
         if not course:
             course = {}
 
@@ -440,13 +519,14 @@ class PromptManager:
                 )
             chapters_str = "\n\n".join(parts)
 
-        return prompt.invoke(
-            {
+        return _render(
+            _EVALUATOR_LA_TEMPLATE,
+            **{
                 "title": course.get("title", "N/A"),
                 "description": course.get("description", "N/A"),
                 "chapter_count": course.get("chapter_count", "N/A"),
                 "has_certificate": course.get("has_certificate", False),
                 "chapters": chapters_str,
                 "messages": messages,
-            }
-        ).to_string()
+            },
+        )
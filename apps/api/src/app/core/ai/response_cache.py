@@ -0,0 +1,93 @@
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from functools import lru_cache
+
+import redis.asyncio as redis
+from dotenv import load_dotenv
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+load_dotenv()
+
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "2048"))
+RESPONSE_CACHE_TTL_SECONDS = int(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "86400"))
+
+
+@lru_cache(maxsize=None)
+def _schema_fingerprint(schema) -> str:
+    return json.dumps(convert_to_openai_tool(schema), sort_keys=True)
+
+
+def _render_messages(prompt) -> list:
+    if isinstance(prompt, str):
+        return [["text", prompt]]
+
+    return [[message.type, message.content] for message in prompt]
+
+
+class ResponseCache:
+    """Content addressed memoization of structured LLM results.
+
+    The key is a hash of the model name, the output schema and the rendered
+    prompt, so only byte-identical requests share a result. Results are kept
+    as JSON in an in-process LRU and, with a Redis client, in Redis as well so
+    that every worker benefits from them.
+    """
+
+    def __init__(
+        self,
+        redis_client: redis.Redis | None = None,
+        max_entries: int = RESPONSE_CACHE_MAX_ENTRIES,
+        ttl_seconds: int = RESPONSE_CACHE_TTL_SECONDS,
+    ):
+        self.redis_client = redis_client
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+
+        self._local: OrderedDict[str, str] = OrderedDict()
+
+    @staticmethod
+    def key(model_name: str, schema, prompt) -> str:
+        payload = json.dumps(
+            [model_name, _schema_fingerprint(schema), _render_messages(prompt)]
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    async def get(self, key: str) -> dict | None:
+        raw = self._local.get(key)
+
+        if raw is not None:
+            self._local.move_to_end(key)
+        elif self.redis_client is not None:
+            raw = await self.redis_client.get(f"llm_response:{key}")
+            if raw is not None:
+                raw = raw.decode() if isinstance(raw, bytes) else raw
+                self._set_local(key, raw)
+
+        return json.loads(raw) if raw is not None else None
+
+    async def set(self, key: str, value: dict):
+        raw = json.dumps(value)
+        self._set_local(key, raw)
+
+        if self.redis_client is not None:
+            await self.redis_client.setex(f"llm_response:{key}", self.ttl_seconds, raw)
+
+    def _set_local(self, key: str, raw: str):
+        self._local[key] = raw
+        self._local.move_to_end(key)
+
+        while len(self._local) > self.max_entries:
+            self._local.popitem(last=False)
+
+
+async def init_response_cache(cache: ResponseCache, redis_client: redis.Redis | None):
+    """Share results through the container's Redis client while the container
+    runs."""
+    cache.redis_client = redis_client
+
+    try:
+        yield cache
+    finally:
+        cache.redis_client = None
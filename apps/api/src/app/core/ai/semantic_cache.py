@@ -0,0 +1,147 @@
+import logging
+import os
+from datetime import datetime, timedelta
+
+import pytz
+from dotenv import load_dotenv
+from langchain_openai import OpenAIEmbeddings
+from sqlalchemy import delete, func, select
+
+from src.db.engine import sessionmanager
+from src.db.models import LlmSemanticCache, EMBEDDING_DIMENSIONS
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "true") == "true"
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95"))
+SEMANTIC_CACHE_TTL_SECONDS = int(os.getenv("SEMANTIC_CACHE_TTL_SECONDS", "604800"))
+SEMANTIC_CACHE_EMBEDDING_MODEL = os.getenv(
+    "SEMANTIC_CACHE_EMBEDDING_MODEL", "text-embedding-3-small"
+)
+# The HNSW index is searched before the namespace filter applies. Iterative
+# scans (pgvector >= 0.8, "off" for older versions) keep searching until a row
+# of the namespace is found, ef_search sets how many candidates each pass
+# considers.
+SEMANTIC_CACHE_ITERATIVE_SCAN = os.getenv(
+    "SEMANTIC_CACHE_ITERATIVE_SCAN", "strict_order"
+)
+SEMANTIC_CACHE_EF_SEARCH = int(os.getenv("SEMANTIC_CACHE_EF_SEARCH", "100"))
+
+
+class SemanticCache:
+    """pgvector backed cache of structured LLM results.
+
+    Rendered prompts are embedded and compared (cosine similarity, HNSW index)
+    with prompts cached in the same namespace. A cached result is returned when
+    the closest prompt is at least ``threshold`` similar and not expired.
+    Cache errors never fail the caller, they are logged and treated as misses.
+    Expired rows are deleted whenever a new result is stored.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = SEMANTIC_CACHE_ENABLED,
+        threshold: float = SEMANTIC_CACHE_THRESHOLD,
+        ttl_seconds: int = SEMANTIC_CACHE_TTL_SECONDS,
+        embedding_model: str = SEMANTIC_CACHE_EMBEDDING_MODEL,
+    ):
+        self.enabled = enabled
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.embedding_model = embedding_model
+
+        self._embeddings: OpenAIEmbeddings | None = None
+
+    @property
+    def embeddings(self) -> OpenAIEmbeddings:
+        # Created on first use, importing the agent needs no OpenAI key.
+        if self._embeddings is None:
+            self._embeddings = OpenAIEmbeddings(
+                model=self.embedding_model, dimensions=EMBEDDING_DIMENSIONS
+            )
+
+        return self._embeddings
+
+    async def lookup(
+        self, namespace: str, prompt: str
+    ) -> tuple[dict | None, list[float] | None]:
+        """Return the cached response (or None) and the prompt embedding."""
+        if not self.enabled:
+            return None, None
+
+        try:
+            embedding = await self.embeddings.aembed_query(prompt)
+            distance = LlmSemanticCache.embedding.cosine_distance(embedding)
+
+            async with sessionmanager.session() as session:
+                # Local to the lookup's transaction.
+                if SEMANTIC_CACHE_ITERATIVE_SCAN != "off":
+                    await session.execute(
+                        select(
+                            func.set_config(
+                                "hnsw.iterative_scan",
+                                SEMANTIC_CACHE_ITERATIVE_SCAN,
+                                True,
+                            )
+                        )
+                    )
+                await session.execute(
+                    select(
+                        func.set_config(
+                            "hnsw.ef_search", str(SEMANTIC_CACHE_EF_SEARCH), True
+                        )
+                    )
+                )
+
+                row = (
+                    await session.execute(
+                        select(LlmSemanticCache.response, distance.label("distance"))
+                        .where(
+                            LlmSemanticCache.namespace == namespace,
+                            LlmSemanticCache.expiresAt > datetime.now(pytz.UTC),
+                        )
+                        .order_by(distance)
+                        .limit(1)
+                    )
+                ).first()
+        except Exception:
+            logger.warning("Semantic cache lookup failed", exc_info=True)
+            return None, None
+
+        if row is None or 1 - row.distance < self.threshold:
+            return None, embedding
+
+        return row.response, embedding
+
+    async def store(
+        self,
+        namespace: str,
+        prompt: str,
+        embedding: list[float] | None,
+        response: dict,
+    ):
+        if not self.enabled or embedding is None:
+            return
+
+        try:
+            async with sessionmanager.session() as session:
+                await session.execute(
+                    delete(LlmSemanticCache).where(
+                        LlmSemanticCache.expiresAt <= datetime.now(pytz.UTC)
+                    )
+                )
+                session.add(
+                    LlmSemanticCache(
+                        namespace=namespace,
+                        prompt=prompt,
+                        embedding=embedding,
+                        response=response,
+                        expiresAt=datetime.now(pytz.UTC)
+                        + timedelta(seconds=self.ttl_seconds),
+                    )
+                )
+                await session.commit()
+        except Exception:
+            logger.warning("Semantic cache store failed", exc_info=True)
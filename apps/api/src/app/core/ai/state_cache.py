@@ -0,0 +1,133 @@
+import os
+import time
+from collections import OrderedDict
+
+import redis.asyncio as redis
+from dotenv import load_dotenv
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+from src.app.core.telemetry import traced
+
+load_dotenv()
+
+LOCAL_TTL_SECONDS = float(os.getenv("CHECKPOINT_CACHE_LOCAL_TTL_SECONDS", "5"))
+REDIS_TTL_SECONDS = int(os.getenv("CHECKPOINT_CACHE_REDIS_TTL_SECONDS", "300"))
+MAX_ENTRIES = int(os.getenv("CHECKPOINT_CACHE_MAX_ENTRIES", "1024"))
+
+
+class CheckpointStateCache:
+    """Cache of the latest checkpoint values per thread_id.
+
+    Reads are served from a small in-process LRU and, when a Redis client is
+    given, from Redis before falling back to ``graph.aget_state``. Writers
+    call ``invalidate`` whenever the graph writes a checkpoint for a thread.
+    Other processes only drop their local copy when it expires, which is why
+    the local TTL is kept short.
+
+    ``invalidate`` also bumps a version, in process and per thread in Redis,
+    so a read that started before a checkpoint write and finishes after the
+    invalidation cannot cache the old values: Redis entries carry the version
+    they were read at and are ignored once it changed, local entries are not
+    stored.
+    """
+
+    def __init__(
+        self,
+        redis_client: redis.Redis | None = None,
+        local_ttl_seconds: float = LOCAL_TTL_SECONDS,
+        redis_ttl_seconds: int = REDIS_TTL_SECONDS,
+        max_entries: int = MAX_ENTRIES,
+    ):
+        self.redis_client = redis_client
+        self.local_ttl_seconds = local_ttl_seconds
+        self.redis_ttl_seconds = redis_ttl_seconds
+        self.max_entries = max_entries
+        self.serde = JsonPlusSerializer()
+
+        self._local: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+        self._local_version = 0
+
+    @traced()
+    async def get_values(self, graph, config: dict) -> dict:
+        thread_id = config["configurable"]["thread_id"]
+
+        values = self._get_local(thread_id)
+        if values is not None:
+            return values
+
+        local_version = self._local_version
+        version = b"0"
+
+        if self.redis_client is not None:
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                pipe.get(self._key(thread_id))
+                pipe.get(self._version_key(thread_id))
+                raw, version = await pipe.execute()
+
+            version = version or b"0"
+
+            if raw is not None:
+                raw_version, type_, data = raw.split(b":", 2)
+                if raw_version == version:
+                    values = self.serde.loads_typed((type_.decode(), data))
+                    self._set_local(thread_id, values)
+                    return values
+
+        snapshot = await graph.aget_state(config)
+        values = snapshot.values if snapshot else {}
+
+        if self._local_version == local_version:
+            self._set_local(thread_id, values)
+
+        if self.redis_client is not None:
+            type_, data = self.serde.dumps_typed(values)
+            await self.redis_client.setex(
+                self._key(thread_id),
+                self.redis_ttl_seconds,
+                version + b":" + type_.encode() + b":" + data,
+            )
+
+        return values
+
+    async def invalidate(self, thread_id: str):
+        self._local.pop(thread_id, None)
+        self._local_version += 1
+
+        if self.redis_client is not None:
+            async with self.redis_client.pipeline(transaction=True) as pipe:
+                pipe.incr(self._version_key(thread_id))
+                # Outlives every entry read at an older version, including
+                # ones stored by reads still in flight.
+                pipe.expire(
+                    self._version_key(thread_id), 2 * self.redis_ttl_seconds
+                )
+                pipe.delete(self._key(thread_id))
+                await pipe.execute()
+
+    def _get_local(self, thread_id: str) -> dict | None:
+        entry = self._local.get(thread_id)
+        if entry is None:
+            return None
+
+        expires_at, values = entry
+        if expires_at < time.monotonic():
+            self._local.pop(thread_id, None)
+            return None
+
+        self._local.move_to_end(thread_id)
+        return values
+
+    def _set_local(self, thread_id: str, values: dict):
+        self._local[thread_id] = (time.monotonic() + self.local_ttl_seconds, values)
+        self._local.move_to_end(thread_id)
+
+        while len(self._local) > self.max_entries:
+            self._local.popitem(last=False)
+
+    @staticmethod
+    def _key(thread_id: str) -> str:
+        return f"checkpoint_state:{thread_id}"
+
+    @staticmethod
+    def _version_key(thread_id: str) -> str:
+        return f"checkpoint_state:{thread_id}:version"
@@ -0,0 +1,71 @@
+import json
+
+from langchain_core.messages import AIMessageChunk
+from langchain_core.utils.json import parse_partial_json
+
+
+def text_part(text: str) -> str:
+    """Vercel AI data stream text part."""
+    return f"0:{json.dumps(text)}\n"
+
+
+def data_part(payload: dict) -> str:
+    """Vercel AI data stream data part, used for progress events."""
+    return f"2:{json.dumps([payload], default=str)}\n"
+
+
+class StructuredMessageStreamer:
+    """Extracts a text field from a structured-output LLM call while it streams.
+
+    Structured output arrives as JSON (as message content or as tool call
+    arguments), so the chunks are accumulated per LLM run, parsed as partial
+    JSON and only the newly generated part of ``field`` is returned.
+    """
+
+    def __init__(self, field: str = "message"):
+        self.field = field
+        self._buffers: dict[str, str] = {}
+        self._sent: dict[str, str] = {}
+        self._last_run: str | None = None
+
+    def feed(self, chunk) -> str:
+        if not isinstance(chunk, AIMessageChunk):
+            return ""
+
+        raw = chunk.content if isinstance(chunk.content, str) else ""
+        for tool_call_chunk in chunk.tool_call_chunks or []:
+            raw += tool_call_chunk.get("args") or ""
+
+        if not raw:
+            return ""
+
+        buffer = self._buffers.get(chunk.id, "") + raw
+        self._buffers[chunk.id] = buffer
+        self._last_run = chunk.id
+
+        parsed = parse_partial_json(buffer)
+        text = parsed.get(self.field) if isinstance(parsed, dict) else None
+
+        if not isinstance(text, str):
+            return ""
+
+        return self._advance(chunk.id, text)
+
+    def finish(self, final_text: str) -> str:
+        """Return the part of the final text that was not streamed yet."""
+        sent = self._sent.get(self._last_run, "") if self._last_run else ""
+        self._last_run = None
+
+        if not final_text.startswith(sent):
+            return ""
+
+        return final_text[len(sent) :]
+
+    def _advance(self, run_id: str, text: str) -> str:
+        sent = self._sent.get(run_id, "")
+
+        if not text.startswith(sent):
+            return ""
+
+        self._sent[run_id] = text
+        return text[len(sent) :]
@@ -0,0 +1,251 @@
+import contextvars
+import dataclasses
+import functools
+import json
+import logging
+import os
+import time
+
+import redis.asyncio as redis
+from dotenv import load_dotenv
+from langgraph.config import get_config
+from langgraph.types import Command
+from opentelemetry import trace
+from prometheus_client import Counter, Histogram
+
+from src.app.core.telemetry import tracer
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+LLM_USAGE_TTL_SECONDS = int(os.getenv("LLM_USAGE_TTL_SECONDS", str(30 * 24 * 3600)))
+
+# USD per million (input, cached input, output) tokens. Override or extend
+# with LLM_PRICES, e.g. '{"gpt-4.1": [2.0, 0.5, 8.0]}'.
+MODEL_PRICES = {
+    "gpt-4.1": (2.0, 0.5, 8.0),
+    "gpt-4.1-mini": (0.4, 0.1, 1.6),
+    "gpt-4.1-nano": (0.1, 0.025, 0.4),
+    "gpt-4o": (2.5, 1.25, 10.0),
+    "gpt-4o-mini": (0.15, 0.075, 0.6),
+    **json.loads(os.getenv("LLM_PRICES", "{}")),
+}
+
+NODE_DURATION = Histogram(
+    "graph_node_duration_seconds",
+    "Wall time of graph node runs",
+    ["node"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40, 80, 160),
+)
+LLM_DURATION = Histogram(
+    "llm_call_duration_seconds",
+    "Wall time of LLM calls that reached the model",
+    ["node", "model"],
+    buckets=(0.25, 0.5, 1, 2, 4, 8, 16, 32, 64),
+)
+LLM_TOKENS = Counter("llm_tokens", "LLM tokens used", ["node", "model", "kind"])
+LLM_COST = Counter("llm_cost_usd", "Estimated LLM cost in USD", ["node", "model"])
+LLM_CACHE_HITS = Counter(
+    "llm_cache_hits", "LLM calls answered from a cache", ["node", "cache"]
+)
+NODE_RETRIES = Counter(
+    "graph_node_retries", "Node runs redoing rejected work", ["node"]
+)
+
+STAGE_ITERATIONS = Histogram(
+    "graph_stage_iterations",
+    "Generator/evaluator iterations until a stage was accepted",
+    ["stage", "outcome"],
+    buckets=(1, 2, 3, 4, 5, 6, 8, 10),
+)
+
+# LLM calls and tokens of the running node, added to the node's state update.
+_node_usage: contextvars.ContextVar[dict | None] = contextvars.ContextVar(
+    "node_usage", default=None
+)
+
+
+def estimate_cost(model_name: str, usage: dict) -> float:
+    prices = MODEL_PRICES.get(model_name.split(":")[-1])
+    if prices is None:
+        return 0.0
+
+    input_price, cached_price, output_price = prices
+    cached = (usage.get("input_token_details") or {}).get("cache_read") or 0
+    uncached = (usage.get("input_tokens") or 0) - cached
+
+    return (
+        uncached * input_price
+        + cached * cached_price
+        + (usage.get("output_tokens") or 0) * output_price
+    ) / 1_000_000
+
+
+def _run_context() -> tuple[str, str | None]:
+    """The running graph node and thread, outside of a graph run ("", None)."""
+    try:
+        config = get_config()
+    except RuntimeError:
+        return "", None
+
+    node = (config.get("metadata") or {}).get("langgraph_node", "")
+    thread_id = (config.get("configurable") or {}).get("thread_id")
+
+    return node, thread_id
+
+
+class UsageRecorder:
+    """Records LLM usage as Prometheus metrics and per draft in Redis.
+
+    The per-draft breakdown is a hash at ``llm_usage:{thread_id}`` with
+    ``{node}:{field}`` counters. Recording errors are logged and dropped,
+    usage tracking never fails a generation.
+    """
+
+    def __init__(self, redis_client: redis.Redis | None = None):
+        self.redis_client = redis_client
+
+    def node(self, fn):
+        """Wrap a graph node to time and trace it and add its LLM calls and
+        tokens to ``llm_calls`` and ``llm_tokens``."""
+
+        @functools.wraps(fn)
+        async def wrapper(state):
+            node, thread_id = _run_context()
+            node_usage = {"llm_calls": 0, "llm_tokens": 0}
+            token = _node_usage.set(node_usage)
+            start = time.perf_counter()
+
+            try:
+                with tracer.start_as_current_span(
+                    f"graph.node {node}",
+                    attributes={"langgraph.node": node, "thread_id": thread_id or ""},
+                ):
+                    result = await fn(state)
+            finally:
+                _node_usage.reset(token)
+                elapsed = time.perf_counter() - start
+                NODE_DURATION.labels(node).observe(elapsed)
+                await self._record(thread_id, node, {"runs": 1}, {"seconds": elapsed})
+
+            if not node_usage["llm_calls"]:
+                return result
+
+            if isinstance(result, Command):
+                return dataclasses.replace(
+                    result, update={**(result.update or {}), **node_usage}
+                )
+
+            return {**(result or {}), **node_usage}
+
+        return wrapper
+
+    async def llm_call(self, model_name: str, usage: dict | None, seconds: float):
+        usage = usage or {}
+        node, thread_id = _run_context()
+        model = model_name.split(":")[-1]
+        prompt_tokens = usage.get("input_tokens") or 0
+        completion_tokens = usage.get("output_tokens") or 0
+
+        node_usage = _node_usage.get()
+        if node_usage is not None:
+            node_usage["llm_calls"] += 1
+            node_usage["llm_tokens"] += prompt_tokens + completion_tokens
+        cost = estimate_cost(model_name, usage)
+
+        span = trace.get_current_span()
+        span.set_attribute("llm.prompt_tokens", prompt_tokens)
+        span.set_attribute("llm.completion_tokens", completion_tokens)
+        span.set_attribute("llm.cost_usd", cost)
+
+        LLM_DURATION.labels(node, model).observe(seconds)
+        LLM_TOKENS.labels(node, model, "prompt").inc(prompt_tokens)
+        LLM_TOKENS.labels(node, model, "completion").inc(completion_tokens)
+        LLM_COST.labels(node, model).inc(cost)
+
+        await self._record(
+            thread_id,
+            node,
+            {
+                "llm_calls": 1,
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+            },
+            {"llm_seconds": seconds, "cost_usd": cost},
+        )
+
+    async def cache_hit(self, cache: str):
+        node, thread_id = _run_context()
+        LLM_CACHE_HITS.labels(node, cache).inc()
+        await self._record(thread_id, node, {"cache_hits": 1}, {})
+
+    async def retry(self):
+        node, thread_id = _run_context()
+        NODE_RETRIES.labels(node).inc()
+        await self._record(thread_id, node, {"retries": 1}, {})
+
+    @staticmethod
+    def node_tokens() -> int:
+        """Tokens the running node used so far (not yet in ``llm_tokens``)."""
+        node_usage = _node_usage.get()
+
+        return node_usage["llm_tokens"] if node_usage else 0
+
+    def stage_finished(self, stage: str, iterations: int, outcome: str):
+        STAGE_ITERATIONS.labels(stage, outcome).observe(iterations)
+
+    async def get(self, thread_id: str) -> dict[str, dict]:
+        """Per-node counters recorded for a thread."""
+        if self.redis_client is None:
+            return {}
+
+        raw = await self.redis_client.hgetall(self._key(thread_id))
+        nodes: dict[str, dict] = {}
+
+        for field, value in raw.items():
+            field = field.decode() if isinstance(field, bytes) else field
+            node, name = field.rsplit(":", 1)
+            nodes.setdefault(node, {})[name] = float(value)
+
+        return nodes
+
+    async def _record(
+        self,
+        thread_id: str | None,
+        node: str,
+        counts: dict[str, int],
+        amounts: dict[str, float],
+    ):
+        if self.redis_client is None or thread_id is None:
+            return
+
+        key = self._key(thread_id)
+
+        try:
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                for name, value in counts.items():
+                    pipe.hincrby(key, f"{node}:{name}", value)
+                for name, value in amounts.items():
+                    pipe.hincrbyfloat(key, f"{node}:{name}", value)
+                pipe.expire(key, LLM_USAGE_TTL_SECONDS)
+                await pipe.execute()
+        except Exception:
+            logger.warning("Recording LLM usage failed", exc_info=True)
+
+    @staticmethod
+    def _key(thread_id: str) -> str:
+        return f"llm_usage:{thread_id}"
+
+
+async def init_usage_recorder(
+    recorder: UsageRecorder, redis_client: redis.Redis | None
+):
+    """Record per draft usage through the container's Redis client while the
+    container runs."""
+    recorder.redis_client = redis_client
+
+    try:
+        yield recorder
+    finally:
+        recorder.redis_client = None
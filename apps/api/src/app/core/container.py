@@ -2,7 +2,17 @@ from dependency_injector import providers
 from dependency_injector.containers import DeclarativeContainer
 from dotenv import load_dotenv
 
+from src.app.core.ai import ai_agent
+from src.app.core.ai.generation_runs import GenerationRunQueue
+from src.app.core.ai.response_cache import init_response_cache
+from src.app.core.ai.state_cache import CheckpointStateCache
+from src.app.core.ai.usage import init_usage_recorder
+from src.app.core.lms.export_jobs import ExportJobQueue
+from src.app.core.lms.lms_client import init_lms_client
+from src.app.core.lms.lms_session import LmsSessionCache
 from src.app.jwt.blacklist import TokenBlacklist
+from src.app.jwt.revoked_filter import init_revoked_token_filter
+from src.app.jwt.user_cache import UserCache
 from src.app.repositories.draft.draft_repository import DraftRepository
 from src.app.repositories.user.user_repository import UserRepository
 from src.app.services.ai.ai_service import AiService
@@ -25,12 +35,58 @@ class Container(DeclarativeContainer):
 
     db_session = providers.Resource(get_db_session)
 
-    token_blacklist = providers.Factory(TokenBlacklist, redis_client)
+    revoked_token_filter = providers.Resource(init_revoked_token_filter, redis_client)
+    token_blacklist = providers.Factory(
+        TokenBlacklist, redis_client, revoked_token_filter
+    )
+    user_cache = providers.Singleton(UserCache)
 
     user_repository = providers.Factory(UserRepository, db_session)
-    auth_service = providers.Factory(AuthService, user_repository, token_blacklist)
+    auth_service = providers.Factory(
+        AuthService, user_repository, token_blacklist, user_cache
+    )
 
     draft_repository = providers.Factory(DraftRepository, db_session)
     draft_service = providers.Factory(DraftService, draft_repository)
 
-    ai_service = providers.Singleton(AiService, draft_repository)
+    checkpoint_state_cache = providers.Singleton(
+        CheckpointStateCache,
+        redis_client=(
+            redis_client
+            if os.getenv("CHECKPOINT_CACHE_BACKEND", "memory") == "redis"
+            else None
+        ),
+    )
+
+    usage_recorder = providers.Resource(
+        init_usage_recorder,
+        providers.Object(ai_agent.usage),
+        redis_client=(
+            redis_client if os.getenv("LLM_USAGE_BACKEND", "redis") == "redis" else None
+        ),
+    )
+    response_cache = providers.Resource(
+        init_response_cache,
+        providers.Object(ai_agent.response_cache),
+        redis_client=(
+            redis_client
+            if os.getenv("RESPONSE_CACHE_BACKEND", "memory") == "redis"
+            else None
+        ),
+    )
+
+    lms_client = providers.Resource(init_lms_client)
+    lms_session_cache = providers.Singleton(LmsSessionCache, redis_client, lms_client)
+    export_job_queue = providers.Singleton(ExportJobQueue, redis_client)
+    generation_run_queue = providers.Singleton(GenerationRunQueue, redis_client)
+
+    ai_service = providers.Singleton(
+        AiService,
+        draft_repository,
+        checkpoint_state_cache,
+        lms_session_cache,
+        export_job_queue,
+        generation_run_queue,
+        usage_recorder,
+        response_cache,
+    )
@@ -0,0 +1,378 @@
+import asyncio
+import json
+import logging
+import os
+import uuid
+from datetime import datetime
+from uuid import UUID
+
+import httpx
+import pytz
+import redis.asyncio as redis
+from dotenv import load_dotenv
+from fastapi import HTTPException
+
+from src.app.core.lms.lms_exporter import LmsExporter
+from src.app.core.workers import acquire_slot
+from src.app.schemas.lms_schemas import ExportItemStatus, ExportJob, ExportReport
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# How long finished jobs stay queryable.
+EXPORT_JOB_TTL_SECONDS = int(os.getenv("EXPORT_JOB_TTL_SECONDS", "86400"))
+# Upper bound on how long a draft stays locked by a job whose worker died.
+EXPORT_JOB_LOCK_TTL_SECONDS = int(os.getenv("EXPORT_JOB_LOCK_TTL_SECONDS", "3600"))
+# How long a draft stays reserved for a job that is not enqueued yet.
+EXPORT_JOB_RESERVATION_SECONDS = int(os.getenv("EXPORT_JOB_RESERVATION_SECONDS", "60"))
+# A job whose worker stopped renewing its lease for this long is recovered by
+# another worker.
+EXPORT_JOB_LEASE_SECONDS = int(os.getenv("EXPORT_JOB_LEASE_SECONDS", "30"))
+EXPORT_WORKER_CONCURRENCY = int(os.getenv("EXPORT_WORKER_CONCURRENCY", "4"))
+
+QUEUE_KEY = "export_jobs:queue"
+PROCESSING_KEY = "export_jobs:processing"
+
+
+class ExportJobQueue:
+    """Redis-backed queue of LMS exports.
+
+    Every job is a hash at ``export_job:{id}`` holding its status and
+    progress, with the course and LMS token kept in a separate payload key so
+    they are never returned by the status endpoint. ``export_job:draft:{id}``
+    points at the draft's active job: a draft is reserved for a job before
+    anything is created in the LMS and stays locked until that job finishes.
+    Workers move dequeued jobs to a processing list and keep a lease key alive
+    while running them, ``requeue_stale`` recovers jobs whose lease expired.
+    """
+
+    def __init__(self, redis_client: redis.Redis):
+        self.redis_client = redis_client
+
+    async def active(self, draft_id: UUID) -> ExportJob | None:
+        """The draft's queued or running job, if any."""
+        job_id = await self.redis_client.get(self._draft_key(draft_id))
+
+        return await self.get(_decode(job_id)) if job_id is not None else None
+
+    async def reserve(self, draft_id: UUID) -> str:
+        """Take the draft for a new job, returning the job id.
+
+        Raises a 409 while another job holds the draft. The reservation
+        expires unless ``enqueue`` follows, ``release`` gives it up early.
+        """
+        job_id = uuid.uuid4().hex
+
+        if not await self.redis_client.set(
+            self._draft_key(draft_id),
+            job_id,
+            nx=True,
+            ex=EXPORT_JOB_RESERVATION_SECONDS,
+        ):
+            raise HTTPException(status_code=409, detail="EXPORT_IN_PROGRESS")
+
+        return job_id
+
+    async def release(self, draft_id: UUID, job_id: str):
+        """Unlock the draft if it is still held by the job."""
+        lock_key = self._draft_key(draft_id)
+        if _decode(await self.redis_client.get(lock_key)) == job_id:
+            await self.redis_client.delete(lock_key)
+
+    async def enqueue(
+        self,
+        job_id: str,
+        draft_id: UUID,
+        user_id: UUID,
+        course: dict,
+        category_title: str,
+        access_token: str,
+        session_key: str | None = None,
+        category_id: str | None = None,
+    ) -> ExportJob:
+        """Queue the job for a draft reserved with ``reserve``."""
+        now = _now()
+        job = ExportJob(
+            id=job_id,
+            draftId=draft_id,
+            userId=user_id,
+            status="queued",
+            total=LmsExporter.count_items(course),
+            createdAt=now,
+            updatedAt=now,
+        )
+        payload = {
+            "course": course,
+            "categoryTitle": category_title,
+            "categoryId": category_id,
+            "accessToken": access_token,
+            "sessionKey": session_key,
+        }
+
+        async with self.redis_client.pipeline(transaction=True) as pipe:
+            pipe.hset(self._job_key(job_id), mapping=self._to_hash(job))
+            pipe.expire(self._job_key(job_id), EXPORT_JOB_TTL_SECONDS)
+            pipe.set(
+                self._payload_key(job_id),
+                json.dumps(payload),
+                ex=EXPORT_JOB_TTL_SECONDS,
+            )
+            pipe.expire(self._draft_key(draft_id), EXPORT_JOB_LOCK_TTL_SECONDS)
+            pipe.lpush(QUEUE_KEY, job_id)
+            await pipe.execute()
+
+        return job
+
+    async def get(self, job_id: str) -> ExportJob | None:
+        raw = await self.redis_client.hgetall(self._job_key(job_id))
+
+        if not raw:
+            return None
+
+        data = {_decode(key): _decode(value) for key, value in raw.items()}
+
+        return ExportJob(
+            id=data["id"],
+            draftId=data["draftId"],
+            userId=data["userId"],
+            status=data["status"],
+            processed=int(data.get("processed") or 0),
+            total=int(data.get("total") or 0),
+            error=data.get("error") or None,
+            report=(
+                ExportReport.model_validate_json(data["report"])
+                if data.get("report")
+                else None
+            ),
+            createdAt=data["createdAt"],
+            updatedAt=data["updatedAt"],
+        )
+
+    async def dequeue(self, timeout: int = 5) -> str | None:
+        job_id = await self.redis_client.blmove(
+            QUEUE_KEY, PROCESSING_KEY, timeout, "RIGHT", "LEFT"
+        )
+
+        if job_id is None:
+            return None
+
+        job_id = _decode(job_id)
+        await self.heartbeat(job_id)
+
+        return job_id
+
+    async def heartbeat(self, job_id: str):
+        await self.redis_client.set(
+            self._lease_key(job_id), 1, ex=EXPORT_JOB_LEASE_SECONDS
+        )
+
+    async def requeue(self, job_id: str):
+        """Put a dequeued job back at the front of the queue."""
+        if await self.redis_client.lrem(PROCESSING_KEY, 0, job_id):
+            await self.redis_client.rpush(QUEUE_KEY, job_id)
+
+        await self.redis_client.delete(self._lease_key(job_id))
+
+    async def requeue_stale(self):
+        """Recover the jobs whose worker stopped renewing their lease.
+
+        Jobs that had not started are queued again. Running exports are
+        failed instead, their first LMS items may exist already and creates
+        are not idempotent, which frees the draft for a new export.
+        """
+        for job_id in await self.redis_client.lrange(PROCESSING_KEY, 0, -1):
+            job_id = _decode(job_id)
+
+            if await self.redis_client.exists(self._lease_key(job_id)):
+                continue
+
+            job = await self.get(job_id)
+
+            if job is None:
+                await self.discard(job_id)
+            elif job.status == "queued":
+                logger.warning("Export job %s lost its worker, requeueing", job_id)
+                await self.requeue(job_id)
+            else:
+                logger.warning("Export job %s lost its worker while running", job_id)
+                await self.fail(job_id, "EXPORT_INTERRUPTED")
+
+    async def discard(self, job_id: str):
+        """Forget a dequeued job without touching its status."""
+        async with self.redis_client.pipeline(transaction=True) as pipe:
+            pipe.lrem(PROCESSING_KEY, 0, job_id)
+            pipe.delete(self._lease_key(job_id), self._payload_key(job_id))
+            await pipe.execute()
+
+    async def claim(self, job_id: str) -> dict | None:
+        """Mark a dequeued job as running and return its payload."""
+        raw = await self.redis_client.get(self._payload_key(job_id))
+
+        if raw is None:
+            return None
+
+        await self._update(job_id, status="running")
+
+        return json.loads(raw)
+
+    async def advance(self, job_id: str):
+        async with self.redis_client.pipeline(transaction=True) as pipe:
+            pipe.hincrby(self._job_key(job_id), "processed", 1)
+            pipe.hset(self._job_key(job_id), "updatedAt", _now().isoformat())
+            await pipe.execute()
+
+    async def complete(self, job_id: str, report: ExportReport):
+        await self._update(
+            job_id, status=report.status, report=report.model_dump_json()
+        )
+        await self._release(job_id)
+
+    async def fail(self, job_id: str, error: str):
+        await self._update(job_id, status="failed", error=error)
+        await self._release(job_id)
+
+    async def _update(self, job_id: str, **fields):
+        fields["updatedAt"] = _now().isoformat()
+        await self.redis_client.hset(self._job_key(job_id), mapping=fields)
+
+    async def _release(self, job_id: str):
+        """Drop the job from processing and, if it is still this job's, the
+        draft lock."""
+        job = await self.get(job_id)
+
+        await self.discard(job_id)
+
+        if job is not None:
+            await self.release(job.draftId, job_id)
+
+    @staticmethod
+    def _to_hash(job: ExportJob) -> dict:
+        return {
+            key: value
+            for key, value in job.model_dump(mode="json").items()
+            if value is not None
+        }
+
+    @staticmethod
+    def _job_key(job_id: str) -> str:
+        return f"export_job:{job_id}"
+
+    @staticmethod
+    def _payload_key(job_id: str) -> str:
+        return f"export_job:{job_id}:payload"
+
+    @staticmethod
+    def _lease_key(job_id: str) -> str:
+        return f"export_job:{job_id}:lease"
+
+    @staticmethod
+    def _draft_key(draft_id: UUID) -> str:
+        return f"export_job:draft:{draft_id}"
+
+
+class ExportWorker:
+    """Runs queued exports, ``concurrency`` jobs at a time."""
+
+    def __init__(
+        self,
+        queue: ExportJobQueue,
+        lms_client: httpx.AsyncClient,
+        redis_client: redis.Redis,
+        concurrency: int = EXPORT_WORKER_CONCURRENCY,
+    ):
+        self.queue = queue
+        self.lms_client = lms_client
+        self.redis_client = redis_client
+        self.concurrency = concurrency
+
+        self._stopping = asyncio.Event()
+
+    def stop(self):
+        self._stopping.set()
+
+    async def run(self):
+        slots = asyncio.Semaphore(self.concurrency)
+        running: set[asyncio.Task] = set()
+        reaper = asyncio.create_task(self._reap())
+
+        try:
+            while await acquire_slot(slots, self._stopping):
+                job_id = await self.queue.dequeue()
+                if job_id is None:
+                    slots.release()
+                    continue
+
+                if self._stopping.is_set():
+                    # Stopped while waiting for a job, leave it to another
+                    # worker.
+                    await self.queue.requeue(job_id)
+                    slots.release()
+                    break
+
+                task = asyncio.create_task(self.process(job_id))
+                running.add(task)
+                task.add_done_callback(running.discard)
+                task.add_done_callback(lambda _: slots.release())
+        finally:
+            reaper.cancel()
+
+            # An export cannot resume halfway, running ones are finished.
+            await asyncio.gather(reaper, *running, return_exceptions=True)
+
+    async def process(self, job_id: str):
+        heartbeat = asyncio.create_task(self._heartbeat(job_id))
+
+        try:
+            await self._export(job_id)
+        finally:
+            heartbeat.cancel()
+
+    async def _export(self, job_id: str):
+        payload = await self.queue.claim(job_id)
+
+        if payload is None:
+            logger.warning("Export job %s has no payload, skipping", job_id)
+            await self.queue.discard(job_id)
+            return
+
+        async def on_item(_: ExportItemStatus):
+            await self.queue.advance(job_id)
+
+        exporter = LmsExporter(self.lms_client, payload["accessToken"], on_item=on_item)
+
+        try:
+            report = await exporter.export(
+                payload["course"], payload["categoryTitle"], payload.get("categoryId")
+            )
+        except HTTPException as e:
+            if e.status_code == 401 and payload.get("sessionKey"):
+                # The token was checked when the job was enqueued, so it
+                # expired or was revoked while queued. Drop it so the next
+                # export logs in again.
+                await self.redis_client.delete(payload["sessionKey"])
+
+            await self.queue.fail(job_id, str(e.detail))
+        except Exception as e:
+            logger.exception("Export job %s failed", job_id)
+            await self.queue.fail(job_id, str(e) or e.__class__.__name__)
+        else:
+            await self.queue.complete(job_id, report)
+
+    async def _heartbeat(self, job_id: str):
+        while True:
+            await asyncio.sleep(EXPORT_JOB_LEASE_SECONDS / 3)
+            await self.queue.heartbeat(job_id)
+
+    async def _reap(self):
+        while True:
+            await self.queue.requeue_stale()
+            await asyncio.sleep(EXPORT_JOB_LEASE_SECONDS)
+
+
+def _decode(value):
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def _now() -> datetime:
+    return datetime.now(pytz.UTC)
@@ -0,0 +1,41 @@
+import os
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+from typing import AsyncIterator
+
+import httpx
+from dotenv import load_dotenv
+
+load_dotenv()
+
+LMS_API_URL = os.getenv("LMS_API_URL", "http://localhost:3000")
+LMS_HTTP2 = os.getenv("LMS_HTTP2", "false") == "true"
+LMS_MAX_CONNECTIONS = int(os.getenv("LMS_MAX_CONNECTIONS", "100"))
+LMS_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("LMS_MAX_KEEPALIVE_CONNECTIONS", "20"))
+LMS_KEEPALIVE_EXPIRY = float(os.getenv("LMS_KEEPALIVE_EXPIRY", "30"))
+LMS_TIMEOUT = float(os.getenv("LMS_TIMEOUT", "30"))
+LMS_CONNECT_TIMEOUT = float(os.getenv("LMS_CONNECT_TIMEOUT", "5"))
+
+
+async def init_lms_client() -> AsyncIterator[httpx.AsyncClient]:
+    """Long-lived, pooled HTTP client for the LMS API.
+
+    The client is shared by every user, so its cookie jar rejects all cookies:
+    the LMS login sets the access token as a cookie, which would otherwise be
+    sent along with other users' requests. Read it from ``response.cookies``.
+    """
+    client = httpx.AsyncClient(
+        base_url=LMS_API_URL,
+        http2=LMS_HTTP2,
+        limits=httpx.Limits(
+            max_connections=LMS_MAX_CONNECTIONS,
+            max_keepalive_connections=LMS_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=LMS_KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(LMS_TIMEOUT, connect=LMS_CONNECT_TIMEOUT),
+        cookies=CookieJar(policy=DefaultCookiePolicy(allowed_domains=[])),
+    )
+
+    try:
+        yield client
+    finally:
+        await client.aclose()
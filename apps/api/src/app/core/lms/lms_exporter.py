@@ -0,0 +1,292 @@
+import asyncio
+import os
+import random
+from typing import Awaitable, Callable
+
+import httpx
+from dotenv import load_dotenv
+from fastapi import HTTPException
+
+from src.app.core.telemetry import traced
+from src.app.schemas.lms_schemas import ExportItemStatus, ExportReport
+
+load_dotenv()
+
+# The LMS assigns display order on creation, so siblings are always created
+# one at a time; the concurrency only applies across the lessons of different
+# chapters.
+LMS_EXPORT_CONCURRENCY = int(os.getenv("LMS_EXPORT_CONCURRENCY", "8"))
+LMS_EXPORT_MAX_RETRIES = int(os.getenv("LMS_EXPORT_MAX_RETRIES", "3"))
+LMS_EXPORT_BACKOFF_SECONDS = float(os.getenv("LMS_EXPORT_BACKOFF_SECONDS", "0.5"))
+
+# Creates are not idempotent, so only failures where the LMS cannot have
+# created the item are retried: the request never reached it, or it was
+# rejected before processing.
+TRANSIENT_STATUS_CODES = {429, 503}
+RETRYABLE_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+class LmsRequestError(Exception):
+    def __init__(self, status_code: int, detail: str, attempts: int):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.attempts = attempts
+
+
+class LmsExporter:
+    """Creates a generated course in the LMS through the shared LMS client.
+
+    The category and course are created first, then the chapters one by one
+    in course order. As soon as a chapter exists its lessons are created, one
+    by one in chapter order, while the next chapters are created. Every
+    request shares one concurrency limit and failures that cannot have
+    created anything are retried with exponential backoff. Chapter and lesson
+    failures do not abort the export, they are reported per item.
+    """
+
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        access_token: str,
+        concurrency: int = LMS_EXPORT_CONCURRENCY,
+        max_retries: int = LMS_EXPORT_MAX_RETRIES,
+        backoff_seconds: float = LMS_EXPORT_BACKOFF_SECONDS,
+        on_item: Callable[[ExportItemStatus], Awaitable[None]] | None = None,
+    ):
+        self.client = client
+        self.headers = {"Authorization": f"Bearer {access_token}"}
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.on_item = on_item
+
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    @staticmethod
+    def count_items(course: dict) -> int:
+        """Number of items ``export`` reports, for progress tracking."""
+        chapters = course.get("chapters") or []
+
+        return 2 + sum(1 + len(chapter.get("lessons") or []) for chapter in chapters)
+
+    async def create_category(self, title: str) -> str:
+        """Create a course category, raising ``LmsRequestError`` on failure."""
+        category_id, _ = await self._create("/api/category", {"title": title})
+
+        return category_id
+
+    @traced()
+    async def export(
+        self, course: dict, category_title: str, category_id: str | None = None
+    ) -> ExportReport:
+        """Export the course, into ``category_id`` when it was created already."""
+        items = []
+        category_item = ExportItemStatus(
+            kind="category", title=category_title, status="failed"
+        )
+
+        if category_id is None:
+            category = await self._create_required(
+                items, category_item, "/api/category", {"title": category_title}
+            )
+        else:
+            category_item.lmsId, category_item.status = category_id, "created"
+            items.append(category_item)
+            await self._finished(category_item)
+            category = category_id
+
+        course_id = await self._create_required(
+            items,
+            ExportItemStatus(
+                kind="course", title=course.get("title", "")[:100], status="failed"
+            ),
+            "/api/course",
+            {
+                "title": course.get("title", "")[:100],
+                "description": course.get("description"),
+                "categoryId": category,
+            },
+        )
+
+        chapters = []
+
+        try:
+            for chapter_index, chapter in enumerate(course.get("chapters") or []):
+                chapter_items, lessons = await self._export_chapter(
+                    course_id, chapter_index, chapter
+                )
+                chapters.append(
+                    (chapter_items, lessons and asyncio.create_task(lessons))
+                )
+
+            await asyncio.gather(*(task for _, task in chapters if task))
+        except BaseException:
+            for _, task in chapters:
+                if task:
+                    task.cancel()
+            raise
+
+        for chapter_items, task in chapters:
+            items.extend(chapter_items)
+            if task:
+                items.extend(task.result())
+
+        completed = all(item.status == "created" for item in items)
+
+        return ExportReport(
+            message="Exported course" if completed else "Exported course partially",
+            status="completed" if completed else "partial",
+            courseId=course_id,
+            items=items,
+        )
+
+    async def _create_required(
+        self, items: list, item: ExportItemStatus, url: str, data: dict
+    ) -> str:
+        try:
+            item.lmsId, item.attempts = await self._create(url, data)
+        except LmsRequestError as e:
+            raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+        item.status = "created"
+        items.append(item)
+        await self._finished(item)
+
+        return item.lmsId
+
+    async def _export_chapter(
+        self, course_id: str, chapter_index: int, chapter: dict
+    ) -> tuple[list[ExportItemStatus], Awaitable[list[ExportItemStatus]] | None]:
+        """Create a chapter, returning its items and the export of its lessons."""
+        chapter_item = ExportItemStatus(
+            kind="chapter",
+            title=chapter.get("title", "")[:100],
+            status="failed",
+            chapterIndex=chapter_index,
+        )
+        lessons = chapter.get("lessons") or []
+
+        try:
+            chapter_item.lmsId, chapter_item.attempts = await self._create(
+                "/api/chapter/beta-create-chapter",
+                {"courseId": course_id, "title": chapter.get("title", "")[:100]},
+            )
+            chapter_item.status = "created"
+        except LmsRequestError as e:
+            chapter_item.error = e.detail
+            chapter_item.attempts = e.attempts
+
+            skipped = [
+                ExportItemStatus(
+                    kind="lesson",
+                    title=lesson.get("title", "")[:100],
+                    status="skipped",
+                    chapterIndex=chapter_index,
+                    lessonIndex=lesson_index,
+                    error="Chapter was not created",
+                )
+                for lesson_index, lesson in enumerate(lessons)
+            ]
+
+            for item in [chapter_item, *skipped]:
+                await self._finished(item)
+
+            return [chapter_item, *skipped], None
+
+        await self._finished(chapter_item)
+
+        return [chapter_item], self._export_lessons(
+            chapter_item.lmsId, chapter_index, lessons
+        )
+
+    async def _export_lessons(
+        self, chapter_id: str, chapter_index: int, lessons: list[dict]
+    ) -> list[ExportItemStatus]:
+        return [
+            await self._export_lesson(chapter_id, chapter_index, lesson_index, lesson)
+            for lesson_index, lesson in enumerate(lessons)
+        ]
+
+    async def _export_lesson(
+        self, chapter_id: str, chapter_index: int, lesson_index: int, lesson: dict
+    ) -> ExportItemStatus:
+        lesson_item = ExportItemStatus(
+            kind="lesson",
+            title=lesson.get("title", "")[:100],
+            status="failed",
+            chapterIndex=chapter_index,
+            lessonIndex=lesson_index,
+        )
+
+        if lesson.get("type") == "ai_mentor":
+            url = "/api/lesson/beta-create-lesson/ai"
+            data = {
+                "chapterId": chapter_id,
+                "title": lesson.get("title", "")[:100],
+                "aiMentorInstructions": lesson.get("ai_mentor_instructions"),
+                "completionConditions": lesson.get("ai_completion_conditions"),
+                "type": lesson.get("mentor_type"),
+            }
+        else:
+            url = "/api/lesson/beta-create-lesson"
+            data = {
+                "chapterId": chapter_id,
+                "title": lesson.get("title", "")[:100],
+                "description": lesson.get("content"),
+                "type": lesson.get("type"),
+            }
+
+        try:
+            lesson_item.lmsId, lesson_item.attempts = await self._create(url, data)
+            lesson_item.status = "created"
+        except LmsRequestError as e:
+            lesson_item.error = e.detail
+            lesson_item.attempts = e.attempts
+
+        await self._finished(lesson_item)
+
+        return lesson_item
+
+    async def _finished(self, item: ExportItemStatus):
+        if self.on_item is not None:
+            await self.on_item(item)
+
+    async def _create(self, url: str, data: dict) -> tuple[str, int]:
+        """POST a create request, returning the created id and the attempt count."""
+        attempt = 0
+
+        while True:
+            attempt += 1
+
+            try:
+                async with self._semaphore:
+                    response = await self.client.post(
+                        url=url, data=data, headers=self.headers
+                    )
+            except RETRYABLE_ERRORS as e:
+                status_code, detail = 503, str(e) or e.__class__.__name__
+            except httpx.TransportError as e:
+                # The LMS may have received the request, retrying could
+                # create a duplicate.
+                raise LmsRequestError(503, str(e) or e.__class__.__name__, attempt)
+            else:
+                if response.status_code in [200, 201]:
+                    created = (response.json() or {}).get("data") or {}
+                    if not created.get("id"):
+                        raise LmsRequestError(
+                            502, "LMS response did not include the created id", attempt
+                        )
+
+                    return created["id"], attempt
+
+                status_code, detail = response.status_code, response.text
+
+                if status_code not in TRANSIENT_STATUS_CODES:
+                    raise LmsRequestError(status_code, detail, attempt)
+
+            if attempt > self.max_retries:
+                raise LmsRequestError(status_code, detail, attempt)
+
+            await asyncio.sleep(
+                self.backoff_seconds * 2 ** (attempt - 1) * random.uniform(0.5, 1.5)
+            )
@@ -0,0 +1,136 @@
+import hashlib
+import hmac
+import os
+import time
+from typing import Awaitable, Callable
+
+import httpx
+import jwt
+import redis.asyncio as redis
+from dotenv import load_dotenv
+from fastapi import HTTPException
+
+from src.app.core.ai.ai_schema import AuthData
+from src.app.core.lms.lms_exporter import LmsRequestError
+from src.app.core.telemetry import traced
+from src.app.jwt.tokens import SECRET_KEY
+
+load_dotenv()
+
+# Used when the LMS token carries no readable ``exp`` claim.
+LMS_TOKEN_FALLBACK_TTL_SECONDS = int(os.getenv("LMS_TOKEN_FALLBACK_TTL_SECONDS", "900"))
+# Cached tokens are dropped this long before they expire, so a token is never
+# handed out just before the LMS starts rejecting it.
+LMS_TOKEN_EXPIRY_MARGIN_SECONDS = int(
+    os.getenv("LMS_TOKEN_EXPIRY_MARGIN_SECONDS", "30")
+)
+# Keys the HMACs of cache keys and credentials, so Redis contents cannot be
+# used to test password guesses offline.
+LMS_SESSION_SECRET = os.getenv("LMS_SESSION_SECRET", SECRET_KEY).encode()
+
+
+class LmsSessionCache:
+    """Redis cache of LMS access tokens, so exports skip the LMS login.
+
+    Tokens are kept in a hash keyed by an HMAC of the user id and LMS email,
+    next to an HMAC of the full credentials, so a changed password logs in
+    again. Both use a server-side secret and never contain the password.
+    """
+
+    def __init__(self, redis_client: redis.Redis, lms_client: httpx.AsyncClient):
+        self.redis_client = redis_client
+        self.lms_client = lms_client
+
+    @staticmethod
+    def key(user_id, auth_data: AuthData) -> str:
+        return f"lms_token:{_hmac(f'{user_id}:{auth_data.email}')}"
+
+    @traced()
+    async def get_token(self, user_id, auth_data: AuthData, refresh: bool = False):
+        """Return a cached LMS access token, logging in when there is none.
+
+        Pass ``refresh=True`` after the LMS rejected the cached token.
+        """
+        key = self.key(user_id, auth_data)
+        credentials = _hmac(f"{user_id}:{auth_data.email}:{auth_data.password}")
+
+        if not refresh:
+            cached = await self.redis_client.hgetall(key)
+            cached = {_decode(field): _decode(value) for field, value in cached.items()}
+
+            if cached.get("token") and hmac.compare_digest(
+                cached.get("credentials", ""), credentials
+            ):
+                return cached["token"]
+
+        token = await self._login(auth_data)
+
+        ttl = self._ttl(token)
+        async with self.redis_client.pipeline(transaction=True) as pipe:
+            pipe.delete(key)
+            if ttl > 0:
+                pipe.hset(key, mapping={"token": token, "credentials": credentials})
+                pipe.expire(key, ttl)
+            await pipe.execute()
+
+        return token
+
+    async def request(
+        self,
+        user_id,
+        auth_data: AuthData,
+        send: Callable[[httpx.AsyncClient, str], Awaitable],
+    ) -> tuple:
+        """Run ``send(client, token)`` with the cached token, logging in again
+        once if the LMS rejects it. Returns the result and the token used.
+        """
+        token = await self.get_token(user_id, auth_data)
+
+        try:
+            return await send(self.lms_client, token), token
+        except LmsRequestError as e:
+            if e.status_code != 401:
+                raise
+
+        token = await self.get_token(user_id, auth_data, refresh=True)
+
+        return await send(self.lms_client, token), token
+
+    async def invalidate(self, user_id, auth_data: AuthData):
+        await self.redis_client.delete(self.key(user_id, auth_data))
+
+    async def _login(self, auth_data: AuthData) -> str:
+        response = await self.lms_client.post(
+            url="/api/auth/login",
+            data={"email": auth_data.email, "password": auth_data.password},
+        )
+
+        if response.status_code != 201:
+            raise HTTPException(status_code=response.status_code, detail=response.text)
+
+        return response.cookies.get("access_token")
+
+    @staticmethod
+    def _ttl(token: str) -> int:
+        """Seconds the token may stay cached, read from its unverified ``exp``.
+
+        The LMS signs its tokens with its own key, the claim is only used to
+        decide when to log in again, never to trust the token.
+        """
+        try:
+            exp = jwt.decode(token, options={"verify_signature": False}).get("exp")
+        except jwt.PyJWTError:
+            exp = None
+
+        if not exp:
+            return LMS_TOKEN_FALLBACK_TTL_SECONDS
+
+        return int(exp - time.time()) - LMS_TOKEN_EXPIRY_MARGIN_SECONDS
+
+
+def _hmac(value: str) -> str:
+    return hmac.new(LMS_SESSION_SECRET, value.encode(), hashlib.sha256).hexdigest()
+
+
+def _decode(value):
+    return value.decode() if isinstance(value, bytes) else value
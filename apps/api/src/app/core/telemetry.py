@@ -0,0 +1,144 @@
+import functools
+import inspect
+import os
+
+from dotenv import load_dotenv
+from opentelemetry import context, trace
+from opentelemetry.trace import Status, StatusCode
+
+load_dotenv()
+
+# "otlp" sends spans to OTEL_EXPORTER_OTLP_ENDPOINT (a local collector by
+# default), "file" appends them as JSON lines to OTEL_TRACES_FILE for offline
+# analysis. Tracing is off unless OTEL_ENABLED=true; the decorators below are
+# then no-ops on the default tracer.
+OTEL_ENABLED = os.getenv("OTEL_ENABLED", "false") == "true"
+OTEL_EXPORTER = os.getenv("OTEL_EXPORTER", "otlp")
+OTEL_TRACES_FILE = os.getenv("OTEL_TRACES_FILE", "traces.jsonl")
+OTEL_SERVICE_NAME = os.getenv("OTEL_SERVICE_NAME", "luma-api")
+
+tracer = trace.get_tracer("luma")
+
+_provider = None
+
+
+def setup_telemetry(app=None, service_name: str = OTEL_SERVICE_NAME):
+    """Install the tracer provider and instrument the app and its clients."""
+    global _provider
+
+    if not OTEL_ENABLED or _provider is not None:
+        return
+
+    from opentelemetry.instrumentation.httpx import HTTPXClientInstrumentor
+    from opentelemetry.instrumentation.redis import RedisInstrumentor
+    from opentelemetry.instrumentation.sqlalchemy import SQLAlchemyInstrumentor
+    from opentelemetry.sdk.resources import SERVICE_NAME, Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor
+
+    from src.db.engine import sessionmanager
+
+    _provider = TracerProvider(resource=Resource.create({SERVICE_NAME: service_name}))
+    _provider.add_span_processor(BatchSpanProcessor(_create_exporter()))
+    trace.set_tracer_provider(_provider)
+
+    if app is not None:
+        from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
+
+        FastAPIInstrumentor.instrument_app(app, excluded_urls="metrics")
+
+    SQLAlchemyInstrumentor().instrument(engine=sessionmanager._engine.sync_engine)
+    HTTPXClientInstrumentor().instrument()
+    RedisInstrumentor().instrument()
+
+
+def shutdown_telemetry():
+    if _provider is not None:
+        _provider.shutdown()
+
+
+async def instrument_connection(connection):
+    """Pool ``configure`` hook tracing the queries of a psycopg connection."""
+    if OTEL_ENABLED:
+        from opentelemetry.instrumentation.psycopg import PsycopgInstrumentor
+
+        PsycopgInstrumentor.instrument_connection(connection)
+
+
+def traced(name: str | None = None):
+    """Run a coroutine function or async generator in its own span.
+
+    Async generators (streamed responses) are resumed from different tasks,
+    so their span is attached around each step instead of for their lifetime.
+    """
+
+    def decorator(fn):
+        span_name = name or fn.__qualname__
+
+        if inspect.isasyncgenfunction(fn):
+
+            @functools.wraps(fn)
+            async def generator_wrapper(*args, **kwargs):
+                span = tracer.start_span(span_name)
+                span_context = trace.set_span_in_context(span)
+                generator = fn(*args, **kwargs)
+
+                try:
+                    while True:
+                        token = context.attach(span_context)
+                        try:
+                            item = await generator.__anext__()
+                        except StopAsyncIteration:
+                            break
+                        finally:
+                            context.detach(token)
+
+                        yield item
+                except Exception as e:
+                    _record_error(span, e)
+                    raise
+                finally:
+                    await generator.aclose()
+                    span.end()
+
+            return generator_wrapper
+
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            with tracer.start_as_current_span(
+                span_name, record_exception=False, set_status_on_exception=False
+            ) as span:
+                try:
+                    return await fn(*args, **kwargs)
+                except Exception as e:
+                    _record_error(span, e)
+                    raise
+
+        return wrapper
+
+    return decorator
+
+
+def _record_error(span, error: Exception):
+    span.record_exception(error)
+
+    # HTTPExceptions below 500 are regular API answers, not failures.
+    status_code = getattr(error, "status_code", 500)
+    if not isinstance(status_code, int) or status_code >= 500:
+        span.set_status(Status(StatusCode.ERROR, str(error)))
+
+
+def _create_exporter():
+    if OTEL_EXPORTER == "file":
+        from opentelemetry.sdk.trace.export import ConsoleSpanExporter
+
+        return ConsoleSpanExporter(
+            out=open(OTEL_TRACES_FILE, "a"),
+            formatter=lambda span: span.to_json(indent=None) + "\n",
+        )
+
+    from opentelemetry.exporter.otlp.proto.http.trace_exporter import (
+        OTLPSpanExporter,
+    )
+
+    return OTLPSpanExporter()
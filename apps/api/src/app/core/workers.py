@@ -0,0 +1,34 @@
+import asyncio
+import contextlib
+
+
+async def acquire_slot(slots: asyncio.Semaphore, stopping: asyncio.Event) -> bool:
+    """Wait for a free worker slot, giving up once the worker is stopping.
+
+    Returns whether a slot was taken. A worker with every slot busy still
+    reacts to a shutdown signal right away instead of after its longest job.
+    """
+    if stopping.is_set():
+        return False
+
+    acquire = asyncio.ensure_future(slots.acquire())
+    stop = asyncio.ensure_future(stopping.wait())
+
+    try:
+        await asyncio.wait({acquire, stop}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        stop.cancel()
+
+        if not acquire.done():
+            acquire.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await acquire
+
+    if acquire.cancelled():
+        return False
+
+    if stopping.is_set():
+        slots.release()
+        return False
+
+    return True
@@ -1,17 +1,73 @@
+import time
+
 import redis.asyncio as redis
 
+from src.app.jwt.revoked_filter import RevokedTokenFilter
+from src.app.jwt.tokens import ACCESS_TOKEN_EXPIRE_MINUTES
+
+
 class TokenBlacklist:
-    """Redis-based token blacklist for logout functionality."""
+    """Redis-based token blacklist for logout functionality.
+
+    Single tokens are revoked by their ``jti`` claim at ``blacklist:{jti}``.
+    Logging out everywhere stores a per-user watermark at
+    ``tokens_revoked_before:{user_id}``; tokens issued at or before it are
+    revoked.
+    """
 
-    def __init__(self, redis_client: redis.Redis):
+    def __init__(
+        self,
+        redis_client: redis.Redis,
+        revoked_filter: RevokedTokenFilter | None = None,
+    ):
         self.redis_client = redis_client
+        self.revoked_filter = revoked_filter
+
+    async def blacklist_token(self, token_id: str, expiry_seconds: int):
+        """Add a token id to the blacklist with expiry."""
+        await self.redis_client.setex(f"blacklist:{token_id}", expiry_seconds, "1")
+
+        if self.revoked_filter is not None:
+            await self.revoked_filter.publish(token_id)
+
+    async def revoke_user_tokens(self, user_id: str):
+        """Revoke every token issued to the user so far."""
+        issued_before = time.time()
+
+        # Outlives every token issued before it.
+        await self.redis_client.setex(
+            self._watermark_key(user_id),
+            ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+            repr(issued_before),
+        )
+
+        if self.revoked_filter is not None:
+            await self.revoked_filter.publish_watermark(user_id, issued_before)
+
+    async def is_revoked(self, token_id: str, user_id: str, issued_at: float) -> bool:
+        """Check if a token is blacklisted or issued before a logout everywhere.
+
+        With a ready local filter, tokens it has never seen revoked skip Redis.
+        """
+        if self.revoked_filter is not None and self.revoked_filter.ready:
+            issued_before = self.revoked_filter.revoked_before(user_id)
+            if issued_before is not None and issued_at <= issued_before:
+                return True
+
+            if not self.revoked_filter.might_contain(token_id):
+                return False
+
+            return await self.redis_client.exists(f"blacklist:{token_id}") > 0
 
-    async def blacklist_token(self, token: str, expiry_seconds: int):
-        """Add a token to the blacklist with expiry."""
-        await self.redis_client.setex(f"blacklist:{token}", expiry_seconds, "1")
+        async with self.redis_client.pipeline(transaction=False) as pipe:
+            pipe.exists(f"blacklist:{token_id}")
+            pipe.get(self._watermark_key(user_id))
+            blacklisted, issued_before = await pipe.execute()
 
-    async def is_blacklisted(self, token: str) -> bool:
-        """Check if a token is blacklisted."""
-        result = await self.redis_client.exists(f"blacklist:{token}")
+        return blacklisted > 0 or (
+            issued_before is not None and issued_at <= float(issued_before)
+        )
 
-        return result > 0
+    @staticmethod
+    def _watermark_key(user_id: str) -> str:
+        return f"tokens_revoked_before:{user_id}"
@@ -6,18 +6,24 @@ from fastapi import HTTPException, status
 from fastapi.params import Depends
 
 from src.app.core.container import Container
+from src.app.core.telemetry import traced
 from src.app.jwt.oauth2 import get_access_token
-from src.app.jwt.tokens import decode_access_token
+from src.app.jwt.tokens import decode_access_token, get_token_id
 from src.app.jwt.blacklist import TokenBlacklist
+from src.app.jwt.user_cache import UserCache
 from src.app.schemas.auth_schemas import UserResponse
 from src.app.services.auth.auth_service import AuthService
 
 
+# inject must stay outermost: wiring only patches the function it wraps, a
+# wrapper on top would copy its markers and keep the providers unbound.
 @inject
+@traced()
 async def get_current_user(
     token: Annotated[str, Depends(get_access_token)],
     auth_service: AuthService = Depends(Provide[Container.auth_service]),
-    token_blacklist: TokenBlacklist = Depends(Provide[Container.token_blacklist])
+    token_blacklist: TokenBlacklist = Depends(Provide[Container.token_blacklist]),
+    user_cache: UserCache = Depends(Provide[Container.user_cache]),
 ) -> UserResponse:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -25,13 +31,6 @@ async def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
 
-    if await token_blacklist.is_blacklisted(token):
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Token has been revoked",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-
     payload = decode_access_token(token)
     if payload is None:
         raise credentials_exception
@@ -40,8 +39,23 @@ async def get_current_user(
     if user_id is None:
         raise credentials_exception
 
+    if await token_blacklist.is_revoked(
+        get_token_id(payload, token), user_id, payload.get("iat", 0)
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has been revoked",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    user = user_cache.get(user_id)
+    if user is not None:
+        return user
+
     try:
         user = await auth_service.get_user_by_id(user_id)
-        return user
     except HTTPException:
         raise credentials_exception
+
+    user_cache.set(user_id, user)
+    return user
@@ -1,14 +1,74 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from dotenv import load_dotenv
 from passlib.context import CryptContext
+from prometheus_client import Gauge, Histogram
+
+load_dotenv()
+
+# bcrypt releases the GIL while hashing, so a thread pool sized to the cores
+# runs hashes in parallel without blocking the event loop. Calls beyond the
+# pool size wait for a free slot.
+PASSWORD_HASH_WORKERS = int(
+    os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 1))
+)
+
+PASSWORD_HASH_QUEUED = Gauge(
+    "password_hash_queued", "Password hash operations waiting for a worker"
+)
+PASSWORD_HASH_RUNNING = Gauge(
+    "password_hash_running", "Password hash operations running"
+)
+PASSWORD_HASH_WAIT = Histogram(
+    "password_hash_wait_seconds",
+    "Time password hash operations waited for a worker",
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+PASSWORD_HASH_DURATION = Histogram(
+    "password_hash_duration_seconds",
+    "Time spent hashing or verifying a password",
+    ["operation"],
+    buckets=(0.05, 0.1, 0.2, 0.3, 0.5, 1, 2),
+)
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+_executor = ThreadPoolExecutor(
+    max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash"
+)
+_slots = asyncio.Semaphore(PASSWORD_HASH_WORKERS)
+
+
+async def _run(operation: str, fn, *args):
+    PASSWORD_HASH_QUEUED.inc()
+    start = time.perf_counter()
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
+    try:
+        await _slots.acquire()
+    finally:
+        PASSWORD_HASH_QUEUED.dec()
+
+    PASSWORD_HASH_WAIT.observe(time.perf_counter() - start)
+    PASSWORD_HASH_RUNNING.inc()
+
+    try:
+        with PASSWORD_HASH_DURATION.labels(operation).time():
+            return await asyncio.get_running_loop().run_in_executor(
+                _executor, fn, *args
+            )
+    finally:
+        PASSWORD_HASH_RUNNING.dec()
+        _slots.release()
+
+
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a plain password against a hashed password."""
-    return pwd_context.verify(plain_password, hashed_password)
+    return await _run("verify", pwd_context.verify, plain_password, hashed_password)
 
 
-def hash_password(password: str) -> str:
+async def hash_password(password: str) -> str:
     """Hash a password using bcrypt."""
-    return pwd_context.hash(password)
-
+    return await _run("hash", pwd_context.hash, password)
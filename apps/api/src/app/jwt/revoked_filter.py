@@ -0,0 +1,195 @@
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import os
+
+import redis.asyncio as redis
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+REVOKED_FILTER_ENABLED = os.getenv("REVOKED_FILTER_ENABLED", "true") == "true"
+REVOKED_FILTER_CAPACITY = int(os.getenv("REVOKED_FILTER_CAPACITY", "100000"))
+REVOKED_FILTER_ERROR_RATE = float(os.getenv("REVOKED_FILTER_ERROR_RATE", "0.001"))
+# Revoked tokens expire from Redis but never leave a Bloom filter, so the
+# filter is rebuilt from the blacklist keys on this interval.
+REVOKED_FILTER_REBUILD_SECONDS = int(
+    os.getenv("REVOKED_FILTER_REBUILD_SECONDS", "3600")
+)
+
+REVOKED_CHANNEL = "blacklist:revoked"
+
+
+class BloomFilter:
+    def __init__(self, capacity: int, error_rate: float):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def add(self, item: str):
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(
+            self._bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(item)
+        )
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+
+        for i in range(self.hash_count):
+            yield (first + i * second) % self.size
+
+
+class RevokedTokenFilter:
+    """Per-process Bloom filter of revoked token ids plus the per-user
+    logout-everywhere watermarks.
+
+    Answers "definitely not revoked" without a Redis round trip. Revocations
+    are published on ``blacklist:revoked`` and applied by every process; the
+    filter is loaded from the ``blacklist:*`` and ``tokens_revoked_before:*``
+    keys after subscribing and rebuilt periodically to forget expired
+    entries. Until it is loaded, and while the subscription is down,
+    ``ready`` is False and callers must ask Redis.
+    """
+
+    def __init__(
+        self,
+        redis_client: redis.Redis,
+        capacity: int = REVOKED_FILTER_CAPACITY,
+        error_rate: float = REVOKED_FILTER_ERROR_RATE,
+        rebuild_seconds: int = REVOKED_FILTER_REBUILD_SECONDS,
+    ):
+        self.redis_client = redis_client
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.rebuild_seconds = rebuild_seconds
+        self.ready = False
+
+        self._filter = BloomFilter(capacity, error_rate)
+        self._watermarks: dict[str, float] = {}
+        self._loading: tuple[BloomFilter, dict[str, float]] | None = None
+        self._task: asyncio.Task | None = None
+
+    def might_contain(self, token_id: str) -> bool:
+        return not self.ready or token_id in self._filter
+
+    def revoked_before(self, user_id: str) -> float | None:
+        return self._watermarks.get(user_id)
+
+    def add(self, token_id: str):
+        self._filter.add(token_id)
+        if self._loading is not None:
+            self._loading[0].add(token_id)
+
+    def set_watermark(self, user_id: str, issued_before: float):
+        self._watermarks[user_id] = issued_before
+        if self._loading is not None:
+            self._loading[1][user_id] = issued_before
+
+    async def publish(self, token_id: str):
+        self.add(token_id)
+        await self.redis_client.publish(REVOKED_CHANNEL, json.dumps({"jti": token_id}))
+
+    async def publish_watermark(self, user_id: str, issued_before: float):
+        self.set_watermark(user_id, issued_before)
+        await self.redis_client.publish(
+            REVOKED_CHANNEL, json.dumps({"user": user_id, "before": issued_before})
+        )
+
+    def start(self):
+        self._task = asyncio.create_task(self._sync())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    async def _sync(self):
+        while True:
+            pubsub = self.redis_client.pubsub()
+
+            try:
+                await pubsub.subscribe(REVOKED_CHANNEL)
+                await self._rebuild()
+
+                loop = asyncio.get_running_loop()
+                rebuild_at = loop.time() + self.rebuild_seconds
+
+                while True:
+                    message = await pubsub.get_message(
+                        ignore_subscribe_messages=True, timeout=1.0
+                    )
+                    if message is not None:
+                        self._apply(json.loads(message["data"]))
+
+                    if loop.time() >= rebuild_at:
+                        await self._rebuild()
+                        rebuild_at = loop.time() + self.rebuild_seconds
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # Revocations published while disconnected were missed.
+                self.ready = False
+                logger.warning("Revoked token filter sync failed", exc_info=True)
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.aclose()
+
+    def _apply(self, event: dict):
+        if "jti" in event:
+            self.add(event["jti"])
+        else:
+            self.set_watermark(event["user"], float(event["before"]))
+
+    async def _rebuild(self):
+        # Revocations arriving during the scan go into both copies.
+        self._loading = (BloomFilter(self.capacity, self.error_rate), {})
+        bloom, watermarks = self._loading
+
+        try:
+            async for key in self.redis_client.scan_iter(
+                match="blacklist:*", count=1000
+            ):
+                bloom.add(_decode(key).removeprefix("blacklist:"))
+
+            async for key in self.redis_client.scan_iter(
+                match="tokens_revoked_before:*", count=1000
+            ):
+                value = await self.redis_client.get(key)
+                if value is not None:
+                    user_id = _decode(key).removeprefix("tokens_revoked_before:")
+                    watermarks[user_id] = float(value)
+
+            self._filter = bloom
+            self._watermarks = watermarks
+            self.ready = True
+        finally:
+            self._loading = None
+
+
+async def init_revoked_token_filter(redis_client: redis.Redis):
+    if not REVOKED_FILTER_ENABLED:
+        yield None
+        return
+
+    revoked_filter = RevokedTokenFilter(redis_client)
+    revoked_filter.start()
+
+    try:
+        yield revoked_filter
+    finally:
+        await revoked_filter.stop()
+
+
+def _decode(value):
+    return value.decode() if isinstance(value, bytes) else value
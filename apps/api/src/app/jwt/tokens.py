@@ -1,4 +1,8 @@
+import hashlib
 import os
+import secrets
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from typing import Optional
 
@@ -11,6 +15,12 @@ load_dotenv()
 SECRET_KEY = os.getenv("JWT_SECRET_KEY", "secret_key")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
+CLAIMS_CACHE_MAX_ENTRIES = int(os.getenv("JWT_CLAIMS_CACHE_MAX_ENTRIES", "4096"))
+
+# Verified claims by token digest, kept until the token expires. A digest
+# match means the exact token string was verified before, so hot clients
+# skip signature verification and JSON decoding.
+_claims_cache: OrderedDict[bytes, tuple[float, dict]] = OrderedDict()
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -20,27 +30,52 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     else:
         expire = datetime.now(pytz.UTC) + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
 
-    to_encode.update({"exp": expire})
+    # jti identifies the token in the blacklist; iat is kept fractional so a
+    # logout-everywhere watermark never covers a token issued right after it.
+    to_encode.update(
+        {"exp": expire, "iat": time.time(), "jti": secrets.token_urlsafe(12)}
+    )
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
 
 def decode_access_token(token: str) -> Optional[dict]:
+    key = hashlib.sha256(token.encode()).digest()
+
+    entry = _claims_cache.get(key)
+    if entry is not None:
+        expires_at, payload = entry
+        if expires_at > time.time():
+            _claims_cache.move_to_end(key)
+            return payload
+
+        _claims_cache.pop(key, None)
+        return None
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
     except jwt.ExpiredSignatureError:
         return None
 
+    if payload.get("exp"):
+        _claims_cache[key] = (payload["exp"], payload)
+        while len(_claims_cache) > CLAIMS_CACHE_MAX_ENTRIES:
+            _claims_cache.popitem(last=False)
+
+    return payload
+
+
+def get_token_id(payload: dict, token: str) -> str:
+    # Tokens minted before the jti claim are blacklisted by their full string.
+    return payload.get("jti") or token
+
 
 def get_token_expiry(token: str) -> Optional[int]:
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        exp = payload.get("exp")
+        payload = decode_access_token(token)
+        exp = payload.get("exp") if payload else None
         if exp:
-            expiry_time = datetime.fromtimestamp(exp)
-            remaining_seconds = int((expiry_time - datetime.utcnow()).total_seconds())
-            return max(remaining_seconds, 0)
+            return max(int(exp - time.time()), 0)
         return None
     except Exception:
         return None
@@ -0,0 +1,58 @@
+import os
+import time
+from collections import OrderedDict
+
+from dotenv import load_dotenv
+
+from src.app.schemas.auth_schemas import UserResponse
+
+load_dotenv()
+
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "30"))
+USER_CACHE_MAX_ENTRIES = int(os.getenv("USER_CACHE_MAX_ENTRIES", "4096"))
+
+
+class UserCache:
+    """In-process LRU of authenticated users by id.
+
+    Lets ``get_current_user`` skip the users query on repeated requests.
+    Entries are dropped by ``invalidate`` when a user changes or logs out in
+    this process; other processes keep their copy until it expires, which is
+    why the TTL is kept short.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = USER_CACHE_TTL_SECONDS,
+        max_entries: int = USER_CACHE_MAX_ENTRIES,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+
+        self._local: OrderedDict[str, tuple[float, UserResponse]] = OrderedDict()
+
+    def get(self, user_id: str) -> UserResponse | None:
+        entry = self._local.get(user_id)
+        if entry is None:
+            return None
+
+        expires_at, user = entry
+        if expires_at < time.monotonic():
+            self._local.pop(user_id, None)
+            return None
+
+        self._local.move_to_end(user_id)
+        return user
+
+    def set(self, user_id: str, user: UserResponse):
+        if self.ttl_seconds <= 0:
+            return
+
+        self._local[user_id] = (time.monotonic() + self.ttl_seconds, user)
+        self._local.move_to_end(user_id)
+
+        while len(self._local) > self.max_entries:
+            self._local.popitem(last=False)
+
+    def invalidate(self, user_id: str):
+        self._local.pop(user_id, None)
@@ -3,6 +3,7 @@ from uuid import UUID
 from sqlalchemy import select, delete
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.app.core.telemetry import traced
 from src.app.schemas.draft_schemas import CreateDraft
 from src.db.models import Draft
 
@@ -11,6 +12,7 @@ class DraftRepository:
     def __init__(self, db: AsyncSession):
         self.db = db
 
+    @traced()
     async def get_all_drafts(self, user_id: UUID):
         result = (
             (await self.db.execute(select(Draft).where(Draft.userId == user_id)))
@@ -19,6 +21,7 @@ class DraftRepository:
         )
         return result
 
+    @traced()
     async def create_draft(self, data: CreateDraft):
         draft = Draft(**data.__dict__)
 
@@ -28,9 +31,11 @@ class DraftRepository:
 
         return draft
 
+    @traced()
     async def get_draft(self, draft_id: UUID):
         return await self.db.get(Draft, draft_id)
 
+    @traced()
     async def delete_draft(self, draft_id: UUID):
         await self.db.execute(delete(Draft).where(Draft.id == draft_id))
         await self.db.commit()
@@ -1,6 +1,7 @@
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.app.core.telemetry import traced
 from src.db.models.user import User
 
 from uuid import UUID
@@ -10,24 +11,28 @@ class UserRepository:
     def __init__(self, db: AsyncSession):
         self.db = db
 
+    @traced()
     async def get_by_email(
         self, email: str
     ) -> User | None:
         result = await self.db.execute(select(User).where(User.email == email))
         return result.scalar_one_or_none()
 
+    @traced()
     async def get_by_id(
         self, user_id: UUID
     ) -> User | None:
         result = await self.db.execute(select(User).where(User.id == user_id))
         return result.scalar_one_or_none()
 
+    @traced()
     async def get_by_username(
         self, username: str
     ) -> User | None:
         result = await self.db.execute(select(User).where(User.username == username))
         return result.scalar_one_or_none()
 
+    @traced()
     async def create(
         self,
         email: str,
@@ -40,6 +45,7 @@ class UserRepository:
         await self.db.refresh(user)
         return user
 
+    @traced()
     async def user_exists(
         self, email: str, username: str
     ) -> tuple[bool, str | None]:
@@ -0,0 +1,36 @@
+from datetime import datetime
+from typing import List, Literal, Optional
+from uuid import UUID
+
+from pydantic import BaseModel
+
+
+class ExportItemStatus(BaseModel):
+    kind: Literal["category", "course", "chapter", "lesson"]
+    title: str
+    status: Literal["created", "failed", "skipped"]
+    lmsId: Optional[str] = None
+    chapterIndex: Optional[int] = None
+    lessonIndex: Optional[int] = None
+    attempts: int = 0
+    error: Optional[str] = None
+
+
+class ExportReport(BaseModel):
+    message: str
+    status: Literal["completed", "partial"]
+    courseId: Optional[str] = None
+    items: List[ExportItemStatus]
+
+
+class ExportJob(BaseModel):
+    id: str
+    draftId: UUID
+    userId: UUID
+    status: Literal["queued", "running", "completed", "partial", "failed"]
+    processed: int = 0
+    total: int = 0
+    error: Optional[str] = None
+    report: Optional[ExportReport] = None
+    createdAt: datetime
+    updatedAt: datetime
@@ -0,0 +1,20 @@
+from typing import Dict
+
+from pydantic import BaseModel
+
+
+class NodeUsage(BaseModel):
+    runs: int = 0
+    seconds: float = 0.0
+    llm_calls: int = 0
+    llm_seconds: float = 0.0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cache_hits: int = 0
+    retries: int = 0
+    cost_usd: float = 0.0
+
+
+class DraftUsage(BaseModel):
+    nodes: Dict[str, NodeUsage]
+    total: NodeUsage
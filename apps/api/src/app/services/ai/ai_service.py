@@ -2,11 +2,9 @@ import asyncio
 import os
 import uuid
 
-import httpx
 from fastapi import HTTPException
 from uuid import UUID
 
-import psycopg
 from dotenv import load_dotenv
 from langchain_core.messages import HumanMessage
 from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
@@ -16,6 +14,7 @@ from langgraph.types import Command
 
 
 from src.app.core.ai.ai_agent import (
+    LESSON_AUTHOR_CONCURRENCY,
     data_curator,
     repeat_curator,
     objective_architect,
@@ -23,33 +22,69 @@ from src.app.core.ai.ai_agent import (
     curriculum_designer,
     evaluator_cd,
     lesson_author,
+    chapter_author,
+    lesson_writer,
+    course_assembler,
 )
 from src.app.core.ai.ai_schema import MessagesState, AuthData
+from src.app.core.ai.generation_runs import GenerationRunQueue
+from src.app.core.ai.response_cache import ResponseCache
+from src.app.core.ai.checkpointer import create_checkpointer_pool
+from src.app.core.ai.state_cache import CheckpointStateCache
+from src.app.core.ai.stream import StructuredMessageStreamer, data_part, text_part
+from src.app.core.ai.usage import UsageRecorder
+from src.app.core.telemetry import traced, tracer
+from src.app.core.lms.export_jobs import ExportJobQueue
+from src.app.core.lms.lms_exporter import LmsExporter, LmsRequestError
+from src.app.core.lms.lms_session import LmsSessionCache
 from src.app.repositories.draft.draft_repository import DraftRepository
 from src.app.schemas.auth_schemas import UserResponse
+from src.app.schemas.usage_schemas import DraftUsage, NodeUsage
 
 load_dotenv()
 
+# "inline" runs the graph inside the chat request, "worker" hands it to the
+# generation workers (worker.py generation) and relays their events.
+GENERATION_MODE = os.getenv("GENERATION_MODE", "inline")
+
 
 class AiService:
     _setup_lock = asyncio.Lock()
 
-    def __init__(self, draft_repository: DraftRepository):
+    def __init__(
+        self,
+        draft_repository: DraftRepository,
+        state_cache: CheckpointStateCache,
+        lms_sessions: LmsSessionCache,
+        export_jobs: ExportJobQueue,
+        generation_runs: GenerationRunQueue,
+        usage_recorder: UsageRecorder,
+        response_cache: ResponseCache,
+    ):
+        # usage_recorder and response_cache are the instances the graph nodes
+        # use, taken here so the container binds them to its Redis client
+        # before a graph runs.
         url = os.getenv("DATABASE_URL")
         self.database_url = url.replace("postgresql+psycopg://", "postgresql://")
         self.draft_repository = draft_repository
+        self.state_cache = state_cache
+        self.lms_sessions = lms_sessions
+        self.export_jobs = export_jobs
+        self.generation_runs = generation_runs
+        self.usage_recorder = usage_recorder
+        self.response_cache = response_cache
 
         self.graph = None
-        self.conn = None
+        self.pool = None
 
     async def setup_graph(self):
         async with AiService._setup_lock:
             if self.graph is not None:
                 return
-            conn = await psycopg.AsyncConnection.connect(
-                self.database_url, autocommit=True
-            )
-            checkpointer = AsyncPostgresSaver(conn=conn)
+            pool = create_checkpointer_pool(self.database_url)
+            await pool.open(wait=True)
+
+            checkpointer = AsyncPostgresSaver(conn=pool)
             await checkpointer.setup()
 
             builder = StateGraph(MessagesState)
@@ -62,14 +97,25 @@ class AiService:
             builder.add_node("evaluator_cd", evaluator_cd)
             # builder.add_node("evaluator_la", evaluator_la)
             builder.add_node("lesson_author", lesson_author)
+            builder.add_node("chapter_author", chapter_author)
+            builder.add_node("lesson_writer", lesson_writer)
+            builder.add_node("course_assembler", course_assembler)
 
             builder.add_edge(START, "data_curator")
             builder.add_edge("repeat_curator", "data_curator")
 
-            self.conn = conn
+            self.pool = pool
 
             self.graph = builder.compile(checkpointer=checkpointer)
 
+    async def close(self):
+        if self.pool is not None:
+            await self.pool.close()
+
+        self.pool = None
+        self.graph = None
+
+    @traced()
     async def chat(self, current_user: UserResponse, message: str, draft_id: UUID):
         if not self.graph:
             await self.setup_graph()
@@ -84,20 +130,113 @@ class AiService:
 
         config = {"configurable": {"thread_id": draft_id.hex}}
 
-        last_state = await self.graph.aget_state(config)
+        last_values = await self.state_cache.get_values(self.graph, config)
 
-        input_state = {"messages": [HumanMessage(content=message)]}
+        resume = bool(last_values) and "__interrupt__" in last_values
 
-        if last_state and last_state.values:
-            has_interrupt = "__interrupt__" in last_state.values
+        # A second message must not resume a run that is still in flight.
+        run_id = await self.generation_runs.reserve(draft_id.hex)
 
-            if has_interrupt:
-                input_state = Command(resume=message)
+        if GENERATION_MODE == "worker":
+            return self.generation_runs.stream(draft_id.hex, run_id, message, resume)
+
+        return self.generation_runs.hold(
+            draft_id.hex, run_id, self.run_generation(draft_id.hex, message, resume)
+        )
+
+    @traced()
+    async def run_generation(
+        self, thread_id: str, message: str, resume: bool, recovered: bool = False
+    ):
+        """Run the graph for one chat message, yielding the chat stream events.
+
+        A checkpoint with pending nodes and no interrupt belongs to a run that
+        failed or was cut off, e.g. halfway through the lessons. That run is
+        continued from its last checkpoint first, so completed chapters and
+        lessons are not generated twice. The message is sent once the old run
+        finished, unless the run was ``recovered`` (a generation worker
+        picking up a run another worker started) and the checkpoint already
+        holds it. Callers hold the thread's reservation, so no other run of
+        the thread is in flight.
+        """
+        if not self.graph:
+            await self.setup_graph()
+
+        config = {
+            "configurable": {"thread_id": thread_id},
+            "max_concurrency": LESSON_AUTHOR_CONCURRENCY,
+        }
+
+        with tracer.start_as_current_span("graph.aget_state"):
+            snapshot = await self.graph.aget_state(config)
+        interrupted = any(task.interrupts for task in snapshot.tasks)
+
+        await self.state_cache.invalidate(thread_id)
+
+        try:
+            if snapshot.next and not interrupted:
+                yield data_part(
+                    {"event": "generation_resumed", "nodes": list(snapshot.next)}
+                )
+
+                async for event in self._stream_graph(
+                    None, config, StructuredMessageStreamer()
+                ):
+                    yield event
+
+                with tracer.start_as_current_span("graph.aget_state"):
+                    snapshot = await self.graph.aget_state(config)
+
+                if recovered and _last_human_message(snapshot.values) == message:
+                    return
 
-        async for event in self.graph.astream(input_state, config):
-            if "data_curator" in event:
-                yield f'0:"{event.get("data_curator").get("messages")[-1].content}"\n'
+                resume = any(task.interrupts for task in snapshot.tasks)
 
+                yield data_part({"event": "queued_message_started"})
+
+            if resume:
+                input_state = Command(resume=message)
+            else:
+                input_state = {"messages": [HumanMessage(content=message)]}
+
+            async for event in self._stream_graph(
+                input_state, config, StructuredMessageStreamer()
+            ):
+                yield event
+        finally:
+            await self.state_cache.invalidate(thread_id)
+
+    async def _stream_graph(self, input_state, config: dict, streamer):
+        thread_id = config["configurable"]["thread_id"]
+
+        async for mode, chunk in self.graph.astream(
+            input_state, config, stream_mode=["messages", "custom", "updates"]
+        ):
+            if mode == "messages":
+                message_chunk, metadata = chunk
+                if metadata.get("langgraph_node") == "data_curator":
+                    delta = streamer.feed(message_chunk)
+                    if delta:
+                        yield text_part(delta)
+
+            elif mode == "custom":
+                yield data_part(chunk)
+
+            elif mode == "updates":
+                await self.state_cache.invalidate(thread_id)
+
+                for node, update in chunk.items():
+                    if node.startswith("__"):
+                        continue
+
+                    if node == "data_curator":
+                        remainder = streamer.finish(update.get("messages")[-1].content)
+                        if remainder:
+                            yield text_part(remainder)
+
+                    yield data_part({"event": "node_finished", "node": node})
+
+    @traced()
     async def get_draft_messages(self, current_user: UserResponse, draft_id: UUID):
         if not self.graph:
             await self.setup_graph()
@@ -109,10 +248,11 @@ class AiService:
 
         config = {"configurable": {"thread_id": draft_id.hex}}
 
-        last_state = await self.graph.aget_state(config)
+        last_values = await self.state_cache.get_values(self.graph, config)
 
-        return last_state.values.get("messages")
+        return last_values.get("messages")
 
+    @traced()
     async def get_course_schema(self, current_user: UserResponse, draft_id: UUID):
         if not self.graph:
             await self.setup_graph()
@@ -124,10 +264,31 @@ class AiService:
 
         config = {"configurable": {"thread_id": draft_id.hex}}
 
-        last_state = await self.graph.aget_state(config)
+        last_values = await self.state_cache.get_values(self.graph, config)
+
+        return last_values.get("course")
 
-        return last_state.values.get("course")
+    @traced()
+    async def get_draft_usage(self, current_user: UserResponse, draft_id: UUID):
+        draft = await self.draft_repository.get_draft(draft_id)
 
+        if not draft or draft.userId != current_user.id:
+            raise HTTPException(status_code=404, detail="NOT_FOUND")
+
+        nodes = {
+            node: NodeUsage(**counters)
+            for node, counters in (await self.usage_recorder.get(draft_id.hex)).items()
+        }
+        total = NodeUsage(
+            **{
+                field: sum(getattr(node, field) for node in nodes.values())
+                for field in NodeUsage.model_fields
+            }
+        )
+
+        return DraftUsage(nodes=nodes, total=total)
+
+    @traced()
     async def export_to_lms(
         self, current_user: UserResponse, auth_data: AuthData, draft_id: UUID
     ):
@@ -139,107 +300,65 @@ class AiService:
         if not draft or draft.userId != current_user.id:
             raise HTTPException(status_code=404, detail="NOT_FOUND")
 
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                url="http://localhost:3000/api/auth/login",
-                data={"email": auth_data.email, "password": auth_data.password},
-            )
-
-        if response.status_code != 201:
-            raise HTTPException(status_code=response.status_code, detail=response.text)
-
-        access_token = response.cookies.get("access_token")
-        headers = {"Authorization": f"Bearer {access_token}"}
-
         config = {"configurable": {"thread_id": draft_id.hex}}
 
-        last_state = await self.graph.aget_state(config)
+        last_values = await self.state_cache.get_values(self.graph, config)
 
-        course = last_state.values.get("course")
+        course = last_values.get("course")
 
         if not course:
             raise HTTPException(status_code=400, detail="NO_COURSE_SCHEMA_CREATED")
 
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                url="http://localhost:3000/api/category",
-                data={"title": (draft.draftName + uuid.uuid4().hex)[:100]},
-                headers=headers,
-            )
-
-            if response.status_code != 201:
-                raise HTTPException(
-                    status_code=response.status_code, detail=response.text
-                )
-
-            category = response.json().get("data").get("id")
-
-            response = await client.post(
-                url="http://localhost:3000/api/course",
-                data={
-                    "title": course.get("title", "")[:100],
-                    "description": course.get("description"),
-                    "categoryId": category,
-                },
-                headers=headers,
+        # Repeated requests get the running export back before anything is
+        # created in the LMS.
+        active_job = await self.export_jobs.active(draft_id)
+        if active_job is not None:
+            return active_job
+
+        job_id = await self.export_jobs.reserve(draft_id)
+        category_title = (draft.draftName + uuid.uuid4().hex)[:100]
+
+        # Creating the category while the credentials are at hand checks the
+        # token the job will use, and logs in again if the LMS rejects it.
+        try:
+            category_id, access_token = await self.lms_sessions.request(
+                current_user.id,
+                auth_data,
+                lambda client, token: LmsExporter(client, token).create_category(
+                    category_title
+                ),
             )
+        except LmsRequestError as e:
+            await self.export_jobs.release(draft_id, job_id)
+            raise HTTPException(status_code=e.status_code, detail=e.detail)
+        except BaseException:
+            await self.export_jobs.release(draft_id, job_id)
+            raise
+
+        return await self.export_jobs.enqueue(
+            job_id=job_id,
+            draft_id=draft_id,
+            user_id=current_user.id,
+            course=course,
+            category_title=category_title,
+            category_id=category_id,
+            access_token=access_token,
+            session_key=self.lms_sessions.key(current_user.id, auth_data),
+        )
+
+    @traced()
+    async def get_export_job(self, current_user: UserResponse, job_id: str):
+        job = await self.export_jobs.get(job_id)
+
+        if not job or job.userId != current_user.id:
+            raise HTTPException(status_code=404, detail="NOT_FOUND")
 
-            if response.status_code != 201:
-                raise HTTPException(
-                    status_code=response.status_code, detail=response.text
-                )
+        return job
 
-            course_id = response.json().get("data").get("id")
 
-            for chapter in course.get("chapters"):
-                response = await client.post(
-                    url="http://localhost:3000/api/chapter/beta-create-chapter",
-                    data={
-                        "courseId": course_id,
-                        "title": chapter.get("title", "")[:100],
-                    },
-                    headers=headers,
-                )
+def _last_human_message(values: dict) -> str | None:
+    for message in reversed(values.get("messages") or []):
+        if isinstance(message, HumanMessage):
+            return message.content
 
-                if response.status_code != 201:
-                    raise HTTPException(
-                        status_code=response.status_code, detail=response.text
-                    )
-
-                chapter_id = response.json().get("data").get("id")
-
-                for lesson in chapter.get("lessons"):
-                    if lesson.get("type") == "ai_mentor":
-                        response = await client.post(
-                            url="http://localhost:3000/api/lesson/beta-create-lesson/ai",
-                            data={
-                                "chapterId": chapter_id,
-                                "title": lesson.get("title", "")[:100],
-                                "aiMentorInstructions": lesson.get(
-                                    "ai_mentor_instructions"
-                                ),
-                                "completionConditions": lesson.get(
-                                    "ai_completion_conditions"
-                                ),
-                                "type": lesson.get("mentor_type"),
-                            },
-                            headers=headers,
-                        )
-                    else:
-                        response = await client.post(
-                            url="http://localhost:3000/api/lesson/beta-create-lesson",
-                            data={
-                                "chapterId": chapter_id,
-                                "title": lesson.get("title", "")[:100],
-                                "description": lesson.get("content"),
-                                "type": lesson.get("type"),
-                            },
-                            headers=headers,
-                        )
-
-                    if response.status_code not in [200, 201]:
-                        raise HTTPException(
-                            status_code=response.status_code, detail=response.text
-                        )
-
-        return {"message": "Exported course"}
+    return None
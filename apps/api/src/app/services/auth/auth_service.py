@@ -1,9 +1,16 @@
 from fastapi import HTTPException, status, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.app.core.telemetry import traced
 from src.app.jwt.password import hash_password, verify_password
-from src.app.jwt.tokens import create_access_token, get_token_expiry
+from src.app.jwt.tokens import (
+    create_access_token,
+    decode_access_token,
+    get_token_expiry,
+    get_token_id,
+)
 from src.app.jwt.blacklist import TokenBlacklist
+from src.app.jwt.user_cache import UserCache
 from src.app.repositories.user.user_repository import UserRepository
 from src.app.schemas.auth_schemas import UserRegister, UserLogin, UserResponse
 from src.db.engine import DatabaseSessionManager
@@ -18,10 +25,13 @@ class AuthService:
         self,
         user_repository: UserRepository,
         token_blacklist: TokenBlacklist,
+        user_cache: UserCache,
     ):
         self.user_repository = user_repository
         self.token_blacklist = token_blacklist
+        self.user_cache = user_cache
 
+    @traced()
     async def register_user(self, user_data: UserRegister) -> UserResponse:
         """Register a new user."""
         exists, reason = await self.user_repository.user_exists(
@@ -33,7 +43,7 @@ class AuthService:
                 status_code=status.HTTP_400_BAD_REQUEST, detail=reason
             )
 
-        hashed_password = hash_password(user_data.password)
+        hashed_password = await hash_password(user_data.password)
         user = await self.user_repository.create(
             email=str(user_data.email),
             username=user_data.username,
@@ -42,6 +52,7 @@ class AuthService:
 
         return UserResponse(**user.__dict__)
 
+    @traced()
     async def authenticate_user(
         self, response: Response, credentials: UserLogin
     ) -> str:
@@ -49,7 +60,7 @@ class AuthService:
             str(credentials.email)
         )
 
-        if not user or not verify_password(
+        if not user or not await verify_password(
             credentials.password, str(user.passwordHash)
         ):
             raise HTTPException(
@@ -70,6 +81,7 @@ class AuthService:
 
         return access_token
 
+    @traced()
     async def get_user_by_id(self, user_id: UUID) -> UserResponse:
         user = await self.user_repository.get_by_id(user_id)
 
@@ -80,6 +92,7 @@ class AuthService:
 
         return UserResponse(**user.__dict__)
 
+    @traced()
     async def logout_user(self, response: Response, token: str) -> None:
         expiry_seconds = get_token_expiry(token)
 
@@ -89,6 +102,22 @@ class AuthService:
                 detail="Invalid or expired token",
             )
 
+        payload = decode_access_token(token)
+
         response.delete_cookie("access_token")
 
-        await self.token_blacklist.blacklist_token(token, expiry_seconds)
+        await self.token_blacklist.blacklist_token(
+            get_token_id(payload, token), expiry_seconds
+        )
+
+        if payload.get("sub"):
+            self.user_cache.invalidate(payload["sub"])
+
+    @traced()
+    async def logout_everywhere(self, response: Response, user_id: UUID) -> None:
+        """Revoke every token issued to the user so far."""
+        response.delete_cookie("access_token")
+
+        await self.token_blacklist.revoke_user_tokens(str(user_id))
+
+        self.user_cache.invalidate(str(user_id))
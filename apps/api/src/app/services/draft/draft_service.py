@@ -2,6 +2,7 @@ from uuid import UUID
 
 from fastapi import HTTPException
 
+from src.app.core.telemetry import traced
 from src.app.repositories.draft.draft_repository import DraftRepository
 from src.app.schemas.auth_schemas import UserResponse
 from src.app.schemas.draft_schemas import (
@@ -15,11 +16,13 @@ class DraftService:
     def __init__(self, draft_repository: DraftRepository):
         self.draft_repository = draft_repository
 
+    @traced()
     async def get_all_drafts(self, current_user: UserResponse):
         drafts = await self.draft_repository.get_all_drafts(current_user.id)
 
         return [DraftResponseBody(**draft.__dict__) for draft in drafts]
 
+    @traced()
     async def get_draft(self, current_user: UserResponse, draft_id: UUID):
         draft = await self.draft_repository.get_draft(draft_id)
 
@@ -28,6 +31,7 @@ class DraftService:
 
         return DraftResponseBody(**draft.__dict__)
 
+    @traced()
     async def create_draft(
         self, current_user: UserResponse, data: CreateDraftRequestBody
     ):
@@ -37,6 +41,7 @@ class DraftService:
 
         return DraftResponseBody(**draft.__dict__)
 
+    @traced()
     async def delete_draft(self, current_user: UserResponse, draft_id: UUID):
         draft = await self.draft_repository.get_draft(draft_id)
 
@@ -1,2 +1,3 @@
 from .user import *
-from .draft import *
\ No newline at end of file
+from .draft import *
+from .llm_semantic_cache import *
\ No newline at end of file
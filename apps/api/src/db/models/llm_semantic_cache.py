@@ -0,0 +1,38 @@
+from datetime import datetime
+
+from pgvector.sqlalchemy import Vector
+from sqlalchemy import String, Text, DateTime, Index
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from src.db.Base import Base
+from src.db.mixins.mixins import IdMixin, TimestampsMixin
+
+EMBEDDING_DIMENSIONS = 1536
+
+
+class LlmSemanticCache(Base, IdMixin, TimestampsMixin):
+    __tablename__ = "llm_semantic_cache"
+
+    namespace: Mapped[str] = mapped_column(
+        "namespace", String(128), nullable=False, index=True
+    )
+    prompt: Mapped[str] = mapped_column("prompt", Text, nullable=False)
+    embedding: Mapped[list[float]] = mapped_column(
+        "embedding", Vector(EMBEDDING_DIMENSIONS), nullable=False
+    )
+    response: Mapped[dict] = mapped_column("response", JSONB, nullable=False)
+
+    expiresAt: Mapped[datetime] = mapped_column(
+        "expires_at", DateTime(timezone=True), nullable=False, index=True
+    )
+
+    __table_args__ = (
+        Index(
+            "ix_llm_semantic_cache_embedding",
+            "embedding",
+            postgresql_using="hnsw",
+            postgresql_with={"m": 16, "ef_construction": 64},
+            postgresql_ops={"embedding": "vector_cosine_ops"},
+        ),
+    )
@@ -0,0 +1,58 @@
+import argparse
+import asyncio
+import logging
+import os
+import signal
+
+from prometheus_client import start_http_server
+
+from src.app.core.ai.generation_runs import GenerationWorker
+from src.app.core.container import Container
+from src.app.core.lms.export_jobs import ExportWorker
+from src.app.core.telemetry import setup_telemetry, shutdown_telemetry
+
+logging.basicConfig(level=logging.INFO)
+
+
+async def main(queue: str):
+    if os.getenv("WORKER_METRICS_PORT"):
+        start_http_server(int(os.getenv("WORKER_METRICS_PORT")))
+
+    setup_telemetry(service_name=f"luma-worker-{queue}")
+
+    container = Container()
+    ai_service = None
+
+    if queue == "generation":
+        ai_service = await container.ai_service()
+        worker = GenerationWorker(
+            queue=await container.generation_run_queue(),
+            ai_service=ai_service,
+        )
+    else:
+        worker = ExportWorker(
+            queue=await container.export_job_queue(),
+            lms_client=await container.lms_client(),
+            redis_client=await container.redis_client(),
+        )
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, worker.stop)
+
+    try:
+        await worker.run()
+    finally:
+        if ai_service is not None:
+            await ai_service.close()
+        await container.shutdown_resources()
+        shutdown_telemetry()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "queue", nargs="?", choices=["exports", "generation"], default="exports"
+    )
+
+    asyncio.run(main(parser.parse_args().queue))